@@ -7,7 +7,7 @@
 import unittest
 
 from xpra.util.objects import typedict, AdHocStruct
-from xpra.client.base.serverinfo import ServerInfoMixin
+from xpra.client.base.serverinfo import ServerInfoMixin, get_remote_lib_versions
 from unit.client.subsystem.clientmixintest_util import ClientMixinTest
 
 
@@ -41,6 +41,33 @@ class ServerInfoClientTest(ClientMixinTest):
 		caps["build.version"] = version
 		assert not x.parse_server_capabilities(caps), "should have failed with version %s" % version
 
+	def test_remote_lib_versions(self):
+		assert get_remote_lib_versions(typedict()) == {}
+		caps = typedict({
+			# nested dictionaries:
+			"glib" : {"version" : (2, 80)},
+			"audio" : {"gst" : {"version" : "1.24.3"}},
+			# flattened keys:
+			"python.version" : "3.12.1",
+			"gtk" : {"version" : [3, 24]},
+			# empty or missing values are skipped:
+			"cairo" : {"version" : ""},
+			"pango" : "not a dict",
+			"sound" : {"gst" : {}},
+			})
+		assert get_remote_lib_versions(caps) == {
+			"glib" : (2, 80),
+			"gtk" : (3, 24),
+			"audio.gst" : (1, 24, 3),
+			"python" : (3, 12, 1),
+			}
+		# custom libraries, with a flattened sub-dictionary:
+		caps = typedict({"foo.bar" : {"version" : "1.2"}, "foo" : {"baz" : {"version" : "3"}}})
+		assert get_remote_lib_versions(caps, libs=("foo.bar", "foo.baz", "foo.missing")) == {
+			"foo.bar" : (1, 2),
+			"foo.baz" : (3, ),
+			}
+
 
 def main():
 	unittest.main()
@@ -7,6 +7,7 @@
 import unittest
 
 from xpra.util.objects import AdHocStruct
+from unit.test_util import LoggerSilencer
 from unit.server.subsystem.servermixintest_util import ServerMixinTest
 from unit.process_test_util import DisplayContext
 
@@ -41,6 +42,59 @@ class DisplayMixinTest(ServerMixinTest):
             return dm
         self._test_mixin_class(make_display_manager, opts, {}, DisplayConnection)
 
+    def test_calculate_workarea(self):
+        from xpra.server.subsystem import display
+        from xpra.server.subsystem.display import DisplayManager
+        from xpra.util.rectangle import rectangle
+        dm = DisplayManager()
+        workareas = []
+
+        def set_workarea(workarea) -> None:
+            # like seamless servers, record the value we have set:
+            dm.workarea = (workarea.x, workarea.y, workarea.width, workarea.height)
+            workareas.append(dm.workarea)
+        dm.set_workarea = set_workarea
+
+        def source(*screen_sizes):
+            ss = AdHocStruct()
+            ss.screen_sizes = screen_sizes
+            return ss
+
+        def check(sources, expected, maxw=2560, maxh=1600):
+            dm.workarea = (0, 0, 0, 0)
+            workareas.clear()
+            dm._server_sources = dict(enumerate(sources))
+            dm.calculate_workarea(maxw, maxh)
+            assert workareas == [expected], f"expected {expected} but got {workareas}"
+
+        # no clients, or no workarea information:
+        check((), (0, 0, 2560, 1600))
+        check((source(), source(None, [], (":0.0", 1920, 1080))), (0, 0, 2560, 1600))
+        # single client:
+        check((source([":0.0", 2560, 1600, 677, 423, [], 0, 0, 2560, 1574]), ), (0, 0, 2560, 1574))
+        # multiple clients, the workarea is the intersection:
+        check((
+            source([":0.0", 2560, 1600, 677, 423, [], 0, 26, 2560, 1574]),
+            source((":0.0", 1920, 1080, 508, 286, (), 64, 0, 1856, 1040)),
+        ), (64, 26, 1856, 1014))
+        # no intersection, use the full display area:
+        with LoggerSilencer(display):
+            check((
+                source([":0.0", 2560, 1600, 677, 423, [], 0, 0, 1000, 1000]),
+                source([":0.0", 2560, 1600, 677, 423, [], 1200, 0, 1000, 1000]),
+            ), (0, 0, 2560, 1600))
+        # unchanged workareas are not set again:
+        sources = {0: source([":0.0", 2560, 1600, 677, 423, [], 0, 0, 2560, 1574])}
+        dm._server_sources = sources
+        workareas.clear()
+        dm.calculate_workarea(2560, 1600)
+        dm.calculate_workarea(2560, 1600)
+        assert workareas == [(0, 0, 2560, 1574)]
+        # but it is set again after being modified elsewhere (ie: dbus `SetWorkarea`):
+        set_workarea(rectangle(10, 10, 100, 100))
+        dm.calculate_workarea(2560, 1600)
+        assert workareas[-1] == (0, 0, 2560, 1574)
+
 
 def main():
     unittest.main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# This file is part of Xpra.
+# Copyright (C) 2025 Antoine Martin <antoine@xpra.org>
+# Xpra is released under the terms of the GNU GPL v2, or, at your option, any
+# later version. See the file COPYING for details.
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from time import time
+
+from xpra.server.subsystem import opengl
+from xpra.server.subsystem.opengl import (
+    get_opengl_cache_dir, get_opengl_fingerprint, load_opengl_cache, run_opengl_probe, save_opengl_cache,
+)
+from xpra.util.env import OSEnvContext
+from unit.test_util import LoggerSilencer
+
+
+class OpenGLCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmpdir.name, "xpra", "opengl-test.json")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_cache_dir(self):
+        with OSEnvContext(XDG_CACHE_HOME=self.tmpdir.name):
+            assert get_opengl_cache_dir() == os.path.join(self.tmpdir.name, "xpra")
+        with OSEnvContext(XDG_CACHE_HOME=""):
+            assert get_opengl_cache_dir() == os.path.join(os.path.expanduser("~"), ".cache", "xpra")
+
+    def test_fingerprint(self):
+        fingerprint = get_opengl_fingerprint(":99")
+        assert fingerprint == get_opengl_fingerprint(":99")
+        assert fingerprint != get_opengl_fingerprint(":100")
+        # upgrading xpra invalidates the cache:
+        import xpra
+        saved = xpra.__version__
+        xpra.__version__ = saved + ".1"
+        try:
+            assert fingerprint != get_opengl_fingerprint(":99")
+        finally:
+            xpra.__version__ = saved
+
+    def test_missing(self):
+        assert load_opengl_cache(self.filename) == {}
+
+    def test_save_load(self):
+        props = {
+            "success": "True",
+            "opengl": (4, 6),
+            "renderer": "llvmpipe",
+        }
+        # the cache directory is created:
+        save_opengl_cache(self.filename, props)
+        assert os.path.exists(self.filename)
+        # versions are tuples again:
+        assert load_opengl_cache(self.filename) == props
+
+    def test_invalid(self):
+        os.makedirs(os.path.dirname(self.filename))
+        with open(self.filename, "w", encoding="utf8") as f:
+            f.write("not json")
+        with LoggerSilencer(opengl):
+            assert load_opengl_cache(self.filename) == {}
+        with open(self.filename, "w", encoding="utf8") as f:
+            json.dump(["not", "a", "dict"], f)
+        assert load_opengl_cache(self.filename) == {}
+
+    def test_error_ttl(self):
+        props = {"error": "probe failed"}
+        save_opengl_cache(self.filename, props)
+        assert load_opengl_cache(self.filename) == props
+        # make it older than the TTL:
+        when = time() - opengl.OPENGL_CACHE_ERROR_TTL - 10
+        os.utime(self.filename, (when, when))
+        assert load_opengl_cache(self.filename) == {}
+        # successful probes don't expire:
+        save_opengl_cache(self.filename, {"success": "True"})
+        os.utime(self.filename, (when, when))
+        assert load_opengl_cache(self.filename) == {"success": "True"}
+
+    def test_probe_command(self):
+        def probe(code: str) -> dict:
+            with LoggerSilencer(opengl):
+                return run_opengl_probe([sys.executable, "-c", code], dict(os.environ), ":99")
+        props = probe("print('success=True'); print('opengl=4.6'); print('renderer=llvmpipe'); print('no separator')")
+        assert props == {"success": "True", "opengl": (4, 6), "renderer": "llvmpipe"}, props
+        props = probe("import sys; sys.stderr.write('Traceback:\\nRuntimeError: no GL\\n'); sys.exit(1)")
+        assert props == {"error": "no GL"}, props
+        saved = opengl.OPENGL_PROBE_TIMEOUT
+        opengl.OPENGL_PROBE_TIMEOUT = 1
+        try:
+            props = probe("import time; time.sleep(10)")
+        finally:
+            opengl.OPENGL_PROBE_TIMEOUT = saved
+        assert props == {"error": "probe timed out after 1 seconds"}, props
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
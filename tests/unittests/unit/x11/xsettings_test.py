@@ -93,6 +93,53 @@ class XSettingsTest(unittest.TestCase):
             rserial, rsettings = v
             assert len(rsettings)==0
 
+    def test_resource_line_re(self):
+        from xpra.x11.subsystem.xsettings import RESOURCE_LINE_RE, INVALID_RESOURCE_LINE_RE
+        value = "Xft.dpi:\t96\nbad line\n\nXft.rgba:\trgb\n"
+        assert RESOURCE_LINE_RE.findall(value) == [("Xft.dpi", "96"), ("Xft.rgba", "rgb")]
+        assert INVALID_RESOURCE_LINE_RE.findall(value) == ["bad line"]
+        # only the first separator splits the line:
+        assert RESOURCE_LINE_RE.findall("key:\ta:\tb") == [("key", "a:\tb")]
+
+    def test_parse_resource_manager(self):
+        from xpra.x11.subsystem import xsettings
+        server = xsettings.XSettingsServer()
+        parse = server.parse_resource_manager
+        assert parse("") == {}
+        # tab separated values, which may contain ':' and '\t':
+        assert parse("Xft.dpi:\t96\nXft.hintstyle:\thintslight\n") == {"Xft.dpi": "96", "Xft.hintstyle": "hintslight"}
+        assert parse("url:\thttp://localhost:8080\n") == {"url": "http://localhost:8080"}
+        assert parse("tabs:\ta\tb\n") == {"tabs": "a\tb"}
+        assert parse("sep:\ta:\tb") == {"sep": "a:\tb"}
+        # malformed lines are skipped:
+        for debug in (False, True):
+            if debug:
+                xsettings.log.enable_debug()
+            try:
+                with LoggerSilencer(xsettings):
+                    assert parse(f"no separator\nkey:value\n:\n\ngood:\tyes\nkey {debug}\tvalue") == {"good": "yes"}
+            finally:
+                xsettings.log.disable_debug()
+        # blocklisted options are skipped:
+        blocked = next(iter(xsettings.BLOCKLISTED_XSETTINGS))
+        assert parse(f"{blocked}:\t2\nother:\t1\n") == {"other": "1"}
+
+    def test_parse_resource_manager_cache(self):
+        from xpra.x11.subsystem.xsettings import XSettingsServer
+        server = XSettingsServer()
+        value = "Xft.dpi:\t96\nXft.antialias:\t1\n"
+        v1 = server.parse_resource_manager(value)
+        assert server._resource_manager_cache == (value, v1)
+        # modifying the result must not affect the cached copy:
+        v1["Xft.dpi"] = 144
+        v2 = server.parse_resource_manager(value)
+        assert v2 == {"Xft.dpi": "96", "Xft.antialias": "1"}
+        assert v2 is not v1
+        # a new value replaces the cache entry:
+        assert server.parse_resource_manager("Xft.dpi:\t120\n") == {"Xft.dpi": "120"}
+        assert server._resource_manager_cache[0] == "Xft.dpi:\t120\n"
+        assert server.parse_resource_manager(value) == {"Xft.dpi": "96", "Xft.antialias": "1"}
+
 
 def main():
     # can only work with an X11 server
@@ -27,33 +27,35 @@ DEFAULT_LIBS = (
 )
 
 
+def get_lib_paths(libs: Sequence[str]) -> tuple[tuple[str, tuple[str, ...]], ...]:
+    return tuple((lib, tuple(lib.split("."))) for lib in libs)
+
+
+DEFAULT_LIB_PATHS = get_lib_paths(DEFAULT_LIBS)
+
+
 def get_remote_lib_versions(c: typedict, libs=DEFAULT_LIBS) -> dict[str, tuple]:
+    paths = DEFAULT_LIB_PATHS if libs is DEFAULT_LIBS else get_lib_paths(libs)
     versions: dict[str, tuple] = {}
-    for x in libs:
-        v = c.get("%s.version" % x, None)
+    for lib, path in paths:
+        # structured access first, ie: {"audio": {"gst": {"version": ..}}}
+        node: Any = c
+        for part in path:
+            node = node.get(part) if isinstance(node, dict) else None
+        v = node.get("version") if isinstance(node, dict) else None
         if v is None:
-            # fallback to structured access:
-            d = c.get(x, None)
-            if isinstance(d, dict):
-                v = typedict(d).get("version", None)
-            elif x.find(".") > 0:
-                # recursive lookup:
-                parts = x.split(".")
-                while parts:
-                    x = parts[0]
-                    sub = c.get(x)
-                    if sub and isinstance(sub, dict):
-                        c = typedict(sub)
-                        parts = parts[1:]
-                    else:
-                        break
-                v = c.get("version", None)
+            # fallback to flattened keys, ie: {"audio.gst.version": ..} or {"audio.gst": {"version": ..}}
+            v = c.get(lib + ".version", None)
+            if v is None:
+                d = c.get(lib, None)
+                if isinstance(d, dict):
+                    v = d.get("version", None)
         if v:
             if isinstance(v, (tuple, list)):
                 v = tuple(v)
             else:
                 v = parse_version(v)
-            versions[x] = v
+            versions[lib] = v
     return versions
 
 
@@ -146,7 +148,7 @@ class ServerInfoMixin(StubClientMixin):
         r = ".".join(str(x) for x in self._remote_version)
         if remote_revision:
             r += f"-r{remote_revision}"
-        mode = c.strget("server.mode", "server")
+        mode = self._remote_server_mode
         bits = c.intget("python.bits", 0)
         bitsstr = "" if bits == 0 else f" {bits}-bit"
         log.info(f"Xpra {mode} server version {std(r)}{bitsstr}")
@@ -9,7 +9,7 @@ import ctypes
 from ctypes.wintypes import HANDLE
 from ctypes import create_string_buffer, byref
 from ctypes.wintypes import DWORD, BYTE
-from collections.abc import Callable, Sequence
+from collections.abc import Callable, Iterator, Sequence
 
 from xpra.os_util import gi_import
 from xpra.platform.win32.common import (
@@ -29,56 +29,87 @@ from xpra.util.str_fn import csv, bytestostr
 from xpra.util.env import envint, envbool
 from xpra.log import Logger
 
+GLib = gi_import("GLib")
+
 log = Logger("keyboard")
 
+# workaround for "period" vs "KP_Decimal" with gtk2 (see ticket #586):
+# translate "period" with keyval=46 and keycode=110 to KP_Decimal:
+KEY_TRANSLATIONS[("period", 46, 110)] = "KP_Decimal"
+# workaround for "fr" keyboards, which use a different key name under X11:
+KEY_TRANSLATIONS[("dead_tilde", 65107, 50)] = "asciitilde"
+KEY_TRANSLATIONS[("dead_grave", 65104, 55)] = "grave"
+
 LAYOUT_MASKS: dict[int, Sequence[int]] = {
     0xffffffff: (0, 16),
     0xffff: (0,),
     0x3ff: (0,),
 }
+LAYOUT_MASK_ITEMS: Final[tuple[tuple[int, Sequence[int]], ...]] = tuple(LAYOUT_MASKS.items())
+LAYOUT_MASK_VALUES: Final[tuple[int, ...]] = tuple(LAYOUT_MASKS.keys())
+
+# the keyboard handles last seen and the layouts they map to:
+_hkl_layouts_cache: tuple[tuple[int, ...], dict[str, int]] = ((), {})
 
 MAPVK_VK_TO_VSC: Final[int] = 0
 
 
+# the argtypes of `GetKeyboardLayoutList` are declared for this buffer size:
+MAX_KEYBOARD_LAYOUTS: Final[int] = 32
+# noinspection PyTypeChecker,PyCallingNonCallable
+_hkl_buffer = (HANDLE * MAX_KEYBOARD_LAYOUTS)()
+
+
 def _GetKeyboardLayoutList() -> list[int]:
-    max_items = 32
-    # PHANDLE = ctypes.POINTER(HANDLE)
-    # noinspection PyTypeChecker,PyCallingNonCallable
-    handle_list = (HANDLE * max_items)()
-    # noinspection PyTypeChecker
-    GetKeyboardLayoutList.argtypes = [ctypes.c_int, ctypes.POINTER(HANDLE * max_items)]
-    count = GetKeyboardLayoutList(max_items, ctypes.byref(handle_list))
-    layouts: list[int] = []
-    for i in range(count):
-        layouts.append(int(handle_list[i]))
-    return layouts
+    count = GetKeyboardLayoutList(MAX_KEYBOARD_LAYOUTS, ctypes.byref(_hkl_buffer))
+    return [int(_hkl_buffer[i] or 0) for i in range(count)]
+
+
+def _candidate_kbids(hkl: int) -> Iterator[int]:
+    """
+    Yields the known layout ids for this keyboard handle,
+    at most one per mask, in `LAYOUT_MASKS` order.
+    """
+    layouts = WIN32_LAYOUTS
+    for mask, bitshifts in LAYOUT_MASK_ITEMS:
+        for bitshift in bitshifts:
+            kbid = (hkl & mask) >> bitshift
+            if kbid in layouts:
+                yield kbid
+                break
+
+
+def _get_hkl_layouts(hkl_list: tuple[int, ...]) -> dict[str, int]:
+    """
+    Map each X11 layout name to the first keyboard handle that provides it.
+    The result is cached until the list of keyboard handles changes.
+    """
+    global _hkl_layouts_cache
+    if hkl_list != _hkl_layouts_cache[0]:
+        layouts_defs: dict[str, int] = {}
+        for hkl in hkl_list:
+            for kbid in _candidate_kbids(hkl):
+                code, _, _, _, layout, variants = WIN32_LAYOUTS[kbid]
+                log("found keyboard layout '%s' / %#x with variants=%s, code '%s' for kbid=%#x",
+                    layout, kbid, variants, code, hkl)
+                if layout and layout not in layouts_defs:
+                    layouts_defs[layout] = hkl
+                    break
+        _hkl_layouts_cache = (hkl_list, layouts_defs)
+    # callers are free to modify the dictionary they get:
+    return dict(_hkl_layouts_cache[1])
 
 
 def get_layout_defs() -> dict[str, int]:
-    layouts_defs: dict[str, int] = {}
     try:
-        hkl_list = _GetKeyboardLayoutList()
+        hkl_list = tuple(_GetKeyboardLayoutList())
         log("GetKeyboardLayoutList()=%s", csv(hex(v) for v in hkl_list))
-        for hkl in hkl_list:
-            for mask, bitshifts in LAYOUT_MASKS.items():
-                kbid = 0
-                for bitshift in bitshifts:
-                    kbid = (hkl & mask) >> bitshift
-                    if kbid in WIN32_LAYOUTS:
-                        break
-                win32_layout = WIN32_LAYOUTS.get(kbid)
-                if win32_layout:
-                    code, _, _, _, layout, variants = win32_layout
-                    log("found keyboard layout '%s' / %#x with variants=%s, code '%s' for kbid=%#x",
-                        layout, kbid, variants, code, hkl)
-                    if layout and layout not in layouts_defs:
-                        layouts_defs[layout] = hkl
-                        break
+        return _get_hkl_layouts(hkl_list)
     except Exception as e:
         log("get_layout_spec()", exc_info=True)
         log.error("Error: failed to detect keyboard layouts using GetKeyboardLayoutList:")
         log.estr(e)
-    return layouts_defs
+    return {}
 
 
 def get_layout_name_value() -> int:
@@ -104,31 +135,11 @@ def get_window_layout() -> int:
 
 
 def x11_layouts_to_win32_hkl() -> dict[str, int]:
-    layout_to_hkl: dict[str, int] = {}
-    max_items = 32
     try:
-        # noinspection PyTypeChecker,PyCallingNonCallable
-        handle_list = (HANDLE * max_items)()
-        count = GetKeyboardLayoutList(max_items, ctypes.byref(handle_list))
-        for i in range(count):
-            hkl = handle_list[i]
-            hkli = int(hkl)
-            for mask, bitshifts in LAYOUT_MASKS.items():
-                kbid = 0
-                for bitshift in bitshifts:
-                    kbid = (hkli & mask) >> bitshift
-                    if kbid in WIN32_LAYOUTS:
-                        break
-                if kbid in WIN32_LAYOUTS:
-                    code, _, _, _, _layout, _variants = WIN32_LAYOUTS[kbid]
-                    log("found keyboard layout '%s' / %#x with variants=%s, code '%s' for kbid=%#x",
-                        _layout, kbid, _variants, code, hkli)
-                    if _layout and _layout not in layout_to_hkl:
-                        layout_to_hkl[_layout] = hkli
-                        break
+        return _get_hkl_layouts(tuple(_GetKeyboardLayoutList()))
     except Exception:
         log("x11_layouts_to_win32_hkl()", exc_info=True)
-    return layout_to_hkl
+    return {}
 
 
 EMULATE_ALTGR = envbool("XPRA_EMULATE_ALTGR", True)
@@ -152,10 +163,9 @@ def get_keys_pressed() -> Sequence[int]:
 
 
 def clear_keys_pressed() -> None:
+    # ctypes arrays are zero-initialized, so this clears all the keys:
     # noinspection PyCallingNonCallable,PyTypeChecker
     keystate = (BYTE * 256)()
-    for i in range(256):
-        keystate[i] = 0
     SetKeyboardState(keystate)
 
 
@@ -223,12 +233,6 @@ class Keyboard(KeyboardBase):
         self.altgr_modifier = ""
         self.delayed_event: tuple[Callable, int, KeyEvent] | None = None
         self.last_layout_message = ""
-        # workaround for "period" vs "KP_Decimal" with gtk2 (see ticket #586):
-        # translate "period" with keyval=46 and keycode=110 to KP_Decimal:
-        KEY_TRANSLATIONS[("period", 46, 110)] = "KP_Decimal"
-        # workaround for "fr" keyboards, which use a different key name under X11:
-        KEY_TRANSLATIONS[("dead_tilde", 65107, 50)] = "asciitilde"
-        KEY_TRANSLATIONS[("dead_grave", 65104, 55)] = "grave"
         self.__x11_layouts_to_win32_hkl = x11_layouts_to_win32_hkl()
 
     def set_platform_layout(self, layout: str) -> None:
@@ -279,19 +283,17 @@ class Keyboard(KeyboardBase):
 
     def AltGr_modifiers(self, modifiers, pressed=True):
         add = []
-        clear = ["mod1", "mod2", "control"]
+        clear = {"mod1", "mod2", "control"}
         if self.altgr_modifier:
             if pressed:
                 add.append(self.altgr_modifier)
             else:
-                clear.append(self.altgr_modifier)
-        log("AltGr_modifiers(%s, %s) AltGr=%s, add=%s, clear=%s", modifiers, pressed, self.altgr_modifier, add, clear)
-        for x in add:
-            if x not in modifiers:
-                modifiers.append(x)
-        for x in clear:
-            if x in modifiers:
-                modifiers.remove(x)
+                clear.add(self.altgr_modifier)
+        log("AltGr_modifiers(%s, %s) AltGr=%s, add=%s, clear=%s",
+            modifiers, pressed, self.altgr_modifier, add, tuple(sorted(clear)))
+        present = set(modifiers)
+        kept = [x for x in modifiers if x not in clear]
+        modifiers[:] = kept + [x for x in add if x not in present and x not in clear]
 
     def get_keymap_modifiers(self) -> tuple[dict, list[str], list[str]]:
         """
@@ -327,7 +329,7 @@ class Keyboard(KeyboardBase):
         if ival:
             sublang = (ival & 0xfc00) >> 10
             log("sublang(%#x)=%#x", ival, sublang)
-            for mask in LAYOUT_MASKS:
+            for mask in LAYOUT_MASK_VALUES:
                 val = ival & mask
                 kbdef = WIN32_KEYBOARDS.get(val, ())
                 log("get_layout_spec() WIN32_KEYBOARDS[%#x]=%s", val, kbdef)
@@ -352,7 +354,7 @@ class Keyboard(KeyboardBase):
 
         with log.trap_error("Error: failed to detect keyboard layout using GetKeyboardLayout"):
             hkl = get_window_layout()
-            for mask in LAYOUT_MASKS:
+            for mask in LAYOUT_MASK_VALUES:
                 kbid = hkl & mask
                 win32_layout = WIN32_LAYOUTS.get(kbid)
                 if not win32_layout:
@@ -412,6 +414,7 @@ class Keyboard(KeyboardBase):
         # self.modifier_keycodes = {"ISO_Level3_Shift": [108]}
         # we can only deal with 'Alt_R' and simulate AltGr (ISO_Level3_Shift)
         # if we have modifier_mappings
+        rmenu: int | None = None
         if EMULATE_ALTGR and self.altgr_modifier and self.modifier_mappings:
             rmenu = GetKeyState(win32con.VK_RMENU)
             if key_event.keyname == "Control_L":
@@ -421,9 +424,7 @@ class Keyboard(KeyboardBase):
                 # delay this one a little bit so we can skip it if an "AltGr" does come through next:
                 if rmenu in (0, 1):
                     self.delayed_event = (send_key_action_cb, wid, key_event)
-                    # needed for altgr emulation timeouts:
-                    glib = gi_import("GLib")
-                    glib.timeout_add(EMULATE_ALTGR_CONTROL_KEY_DELAY, self.send_delayed_key)
+                    GLib.timeout_add(EMULATE_ALTGR_CONTROL_KEY_DELAY, self.send_delayed_key)
                 return
             if key_event.keyname == "Alt_R":
                 log("process_key_event: Alt_R pressed=%s, with GetKeyState(VK_RMENU)=%s", key_event.pressed, rmenu)
@@ -438,16 +439,17 @@ class Keyboard(KeyboardBase):
                 key_event.keyval = -1
                 key_event.keycode = -1
                 self.AltGr_modifiers(key_event.modifiers)
-        self.send_delayed_key()
+        self.send_delayed_key(rmenu)
         super().process_key_event(send_key_action_cb, wid, key_event)
 
-    def send_delayed_key(self) -> None:
+    def send_delayed_key(self, rmenu: int | None = None) -> None:
         # timeout: this must be a real one, send it now
         dk = self.delayed_event
         log("send_delayed_key() delayed_event=%s", dk)
         if dk:
             self.delayed_event = None
-            rmenu = GetKeyState(win32con.VK_RMENU)
+            if rmenu is None:
+                rmenu = GetKeyState(win32con.VK_RMENU)
             log("send_delayed_key() GetKeyState(VK_RMENU)=%s", rmenu)
             if rmenu in (0, 1):
                 super().process_key_event(*dk)
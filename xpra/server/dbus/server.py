@@ -114,7 +114,7 @@ class DBUS_Server(DBUS_Server_Base):
     def SetKeyboardRepeat(self, repeat_delay, repeat_interval):
         d, i = ni(repeat_delay), ni(repeat_interval)
         self.log(".SetKeyboardRepeat(%i, %i)", d, i)
-        self.server.set_keyboard_repeat(d, i)
+        self.server.set_keyboard_repeat(d, i, True)
 
     @dbus.service.method(INTERFACE, in_signature='iii')
     def MovePointer(self, wid, x, y):
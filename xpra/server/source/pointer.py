@@ -35,8 +35,8 @@ class PointerConnection(StubClientConnection):
     def parse_client_caps(self, c: typedict) -> None:
         pointer = typedict(c.dictget("pointer", {}))
         log(f"parse_client_caps(..) {pointer=}")
-        dc = typedict(pointer.dictget("double_click", {}))
         if not BACKWARDS_COMPATIBLE:
+            dc = typedict(pointer.dictget("double_click", {}))
             self.double_click_time = dc.intget("time", -1)
             self.double_click_distance = dc.intpair("distance", (-1, -1))
             self.mouse_last_position = pointer.intpair("initial-position")
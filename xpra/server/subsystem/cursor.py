@@ -4,8 +4,10 @@
 # later version. See the file COPYING for details.
 
 from typing import Any
+from operator import itemgetter
+from collections.abc import Callable
 
-from xpra.common import BACKWARDS_COMPATIBLE
+from xpra.common import BACKWARDS_COMPATIBLE, noop
 from xpra.net.common import Packet
 from xpra.util.system import is_X11
 from xpra.util.objects import typedict
@@ -14,12 +16,17 @@ from xpra.log import Logger
 
 log = Logger("cursor")
 
+# all but pixels:
+CURSOR_INFO_FIELDS = ("x", "y", "width", "height", "xhot", "yhot", "serial", "name")
+get_cursor_info_values = itemgetter(0, 1, 2, 3, 4, 5, 6, 8)
+
 
 class CursorManager(StubServerMixin):
     """
     Servers that send cursor bitmaps.
     """
     PREFIX = "cursor"
+    SET_PACKET = f"{PREFIX}-set"
 
     def __init__(self):
         StubServerMixin.__init__(self)
@@ -28,7 +35,11 @@ class CursorManager(StubServerMixin):
         self.cursor_suspended: bool = False
         # x11:
         self.default_cursor_image = None
+        # the pixels of the default cursor, used for identifying it:
+        self.default_cursor_pixels = None
         self.last_cursor_image = ()
+        # (0, 0) until we have queried the platform:
+        self.max_cursor_size: tuple[int, int] = (0, 0)
 
     def init(self, opts) -> None:
         log("init(..) cursors=%s", opts.cursors)
@@ -40,29 +51,42 @@ class CursorManager(StubServerMixin):
         if share_count > 0:
             self.cursor_size = 24
         else:
-            self.cursor_size = c.intget("cursor.size", 0)
+            # this is almost always an int already:
+            size = c.get("cursor.size", 0)
+            self.cursor_size = size if isinstance(size, int) else c.intget("cursor.size", 0)
 
     def send_initial_data(self, ss, caps, send_ui: bool, share_count: int) -> None:
         if not send_ui:
             return
-        from xpra.server.source.cursor import CursorsConnection
-        if isinstance(ss, CursorsConnection):
-            ss.send_cursor()
+        # not all client connections support `send_cursor`:
+        send_cursor: Callable = getattr(ss, "send_cursor", noop)
+        send_cursor()
+
+    def get_max_cursor_size(self) -> tuple[int, int]:
+        # this is a fixed platform limit, so we only query it once
+        # (unlike the default size, which follows the `Xcursor.size` resource):
+        if self.max_cursor_size == (0, 0):
+            from xpra.platform.gui import get_max_cursor_size
+            w, h = get_max_cursor_size()
+            self.max_cursor_size = (w, h)
+        return self.max_cursor_size
 
     def get_caps(self, source) -> dict[str, Any]:
-        from xpra.platform.gui import get_default_cursor_size, get_max_cursor_size
-        cursor_caps = {}
-        sizes = cursor_caps.setdefault("sizes", {})
+        from xpra.platform.gui import get_default_cursor_size
+        cursor_caps: dict[str, Any] = {}
+        sizes: dict[str, tuple[int, int]] = {}
         dsize = get_default_cursor_size()
         if min(dsize) > 0:
             sizes["default"] = dsize
             if BACKWARDS_COMPATIBLE:
                 cursor_caps["default_size"] = round(sum(dsize) / len(dsize))
-        max_size = get_max_cursor_size()
+        max_size = self.get_max_cursor_size()
         if min(max_size) > 0:
             sizes["max"] = max_size
             if BACKWARDS_COMPATIBLE:
                 cursor_caps["max_size"] = max_size
+        if sizes:
+            cursor_caps["sizes"] = sizes
         if self.default_cursor_image and "default_cursor" in source.wants:
             ce = getattr(source, "cursor_encodings", ())
             if "default" not in ce:
@@ -92,26 +116,23 @@ class CursorManager(StubServerMixin):
         cd = self.last_cursor_image
         if not cd:
             return {}
-        dci = self.default_cursor_image
-        cinfo = {
-            "is-default": bool(dci) and len(dci) >= 8 and len(cd) >= 8 and cd[7] == dci[7],
+        dpixels = self.default_cursor_pixels
+        is_default = dpixels is not None and len(cd) >= 8 and cd[7] == dpixels
+        cinfo: dict[str, Any] = {
+            "is-default": is_default,
         }
-        # all but pixels:
-        for i, x in enumerate(("x", "y", "width", "height", "xhot", "yhot", "serial", None, "name")):
-            if x:
-                v = cd[i] or ""
-                cinfo[x] = v
+        cinfo.update(zip(CURSOR_INFO_FIELDS, (v or "" for v in get_cursor_info_values(cd))))
         return cinfo
 
     def get_ui_info(self, _proto, **kwargs) -> dict[str, Any]:
         # (from UI thread)
-        info: dict[str, Any] = {}
-        from xpra.platform.gui import get_default_cursor_size, get_max_cursor_size
-        for name, size in {
-            "default": get_default_cursor_size(),
-            "max": get_max_cursor_size(),
-        }.items():
-            info.setdefault("sizes", {})[name] = size
+        from xpra.platform.gui import get_default_cursor_size
+        info: dict[str, Any] = {
+            "sizes": {
+                "default": get_default_cursor_size(),
+                "max": self.get_max_cursor_size(),
+            },
+        }
         if is_X11():
             from xpra.x11.error import xswallow
             with xswallow:
@@ -139,7 +160,9 @@ class CursorManager(StubServerMixin):
         ss = self.get_server_source(proto)
         if ss:
             ss.cancel_cursor_timer()
-            ss.send_empty_cursor()
+            # no need to send anything if the client is already using its default cursor:
+            if getattr(ss, "last_cursor_sent", ()):
+                ss.send_empty_cursor()
 
     def restore_cursor(self, proto) -> None:
         # see suspend_cursor
@@ -151,5 +174,5 @@ class CursorManager(StubServerMixin):
             ss.send_cursor()
 
     def init_packet_handlers(self) -> None:
-        self.add_packets(f"{CursorManager.PREFIX}-set")
-        self.add_legacy_alias("set-cursors", f"{CursorManager.PREFIX}-set")
+        self.add_packets(CursorManager.SET_PACKET)
+        self.add_legacy_alias("set-cursors", CursorManager.SET_PACKET)
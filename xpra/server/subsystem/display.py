@@ -4,13 +4,15 @@
 # later version. See the file COPYING for details.
 
 import os
+from time import monotonic
 from typing import Any
+from collections.abc import Iterator
 
 from xpra.os_util import gi_import, POSIX, OSX
 from xpra.util.rectangle import rectangle
 from xpra.util.objects import typedict
 from xpra.util.screen import log_screen_sizes
-from xpra.util.env import SilenceWarningsContext
+from xpra.util.env import envint, SilenceWarningsContext
 from xpra.net.common import Packet
 from xpra.common import get_refresh_rate_for_value, noop, BACKWARDS_COMPATIBLE
 from xpra.platform.gui import get_display_name, get_display_size
@@ -21,14 +23,25 @@ GLib = gi_import("GLib")
 
 log = Logger("screen")
 
+# wait this long for more screen change events before acting (ms):
+SCREEN_CHANGED_DELAY = envint("XPRA_SCREEN_CHANGED_DELAY", 4)
+# but never postpone the update for longer than this (ms):
+SCREEN_CHANGED_MAX_DELAY = envint("XPRA_SCREEN_CHANGED_MAX_DELAY", 50)
+
+
+display_type = ""
+
 
 def get_display_type() -> str:
-    if POSIX and not OSX:
-        from xpra.util.system import is_Wayland
-        if is_Wayland():
-            return "Wayland"
-        return "X11"
-    return "Main"
+    # `is_Wayland()` uses the environment saved at startup,
+    # so the result cannot change:
+    global display_type
+    if not display_type:
+        display_type = "Main"
+        if POSIX and not OSX:
+            from xpra.util.system import is_Wayland
+            display_type = "Wayland" if is_Wayland() else "X11"
+    return display_type
 
 
 def get_desktop_size_capability(server_source, root_w: int, root_h: int) -> tuple[int, int]:
@@ -55,6 +68,19 @@ def set_window_refresh_rate(ss, rrate: int):
                 bc.match_vrefresh(rrate)
 
 
+def get_client_workareas(sources) -> Iterator[tuple[int, int, int, int]]:
+    for ss in sources:
+        screen_sizes = ss.screen_sizes
+        log("calculate_workarea() screen_sizes(%s)=%s", ss, screen_sizes)
+        for display in screen_sizes or ():
+            # display: [':0.0', 2560, 1600, 677, 423, [['DFP2', 0, 0, 2560, 1600, 646, 406]], 0, 0, 2560, 1574]
+            # (the type and length check also skips entries from old/broken clients)
+            if isinstance(display, (list, tuple)) and len(display) >= 10:
+                workarea = display[6:10]
+                log("calculate_workarea() found %s for display %s", workarea, display[0])
+                yield workarea
+
+
 class DisplayManager(StubServerMixin):
     """
     Mixin for servers that handle displays.
@@ -71,6 +97,9 @@ class DisplayManager(StubServerMixin):
         self.display = os.environ.get("DISPLAY", "")
         self.display_options = ""
         self.screen_size_changed_timer = 0
+        self.screen_changed_first = 0.0
+        self.send_updated_screen_size_timer = 0
+        self.workarea: tuple[int, int, int, int] = (0, 0, 0, 0)
         self.default_dpi = 96
         self.bit_depth = 24
         self.dpi = 0
@@ -93,6 +122,7 @@ class DisplayManager(StubServerMixin):
 
     def cleanup(self) -> None:
         self.cancel_screen_size_changed_timer()
+        self.cancel_send_updated_screen_size_timer()
 
     def cancel_screen_size_changed_timer(self):
         ssct = self.screen_size_changed_timer
@@ -100,6 +130,12 @@ class DisplayManager(StubServerMixin):
             self.screen_size_changed_timer = 0
             GLib.source_remove(ssct)
 
+    def cancel_send_updated_screen_size_timer(self):
+        sust = self.send_updated_screen_size_timer
+        if sust:
+            self.send_updated_screen_size_timer = 0
+            GLib.source_remove(sust)
+
     def print_screen_info(self) -> None:
         for x in self.get_display_description().split("\n"):
             log.info(x)
@@ -157,7 +193,8 @@ class DisplayManager(StubServerMixin):
                 # legacy mode, ie: html5 client
                 self.dpi = self.xdpi = self.ydpi = int(dpi_caps)
             else:
-                tdpi = typedict(c.dictget("dpi") or {})
+                # we already have the value, no need to look it up again:
+                tdpi = typedict(dpi_caps if isinstance(dpi_caps, dict) else {})
                 self.dpi = tdpi.intget("", 0)
                 self.xdpi = tdpi.intget("x", self.xdpi)
                 self.ydpi = tdpi.intget("y", self.ydpi)
@@ -189,9 +226,8 @@ class DisplayManager(StubServerMixin):
             max_size = self.get_max_screen_size()
             if max_size:
                 features["max_desktop_size"] = max_size
-            display = os.environ.get("DISPLAY", "")
-            if display:
-                features["display"] = display
+            if self.display:
+                features["display"] = self.display
         return features
 
     def get_ui_info(self, proto, **kwargs) -> dict[str, Any]:
@@ -269,8 +305,18 @@ class DisplayManager(StubServerMixin):
         return w, h
 
     def schedule_screen_changed(self, screen):
+        # RandR usually fires more than one event for a single change,
+        # so wait a little for more events, but not past the deadline:
+        now = monotonic()
+        if not self.screen_size_changed_timer:
+            self.screen_changed_first = now
+        remaining = SCREEN_CHANGED_MAX_DELAY - round(1000 * (now - self.screen_changed_first))
+        if remaining <= 0:
+            # the pending timer will fire very soon
+            return
         self.cancel_screen_size_changed_timer()
-        self.screen_size_changed_timer = GLib.timeout_add(10, self.screen_size_changed, screen)
+        delay = max(0, min(SCREEN_CHANGED_DELAY, remaining))
+        self.screen_size_changed_timer = GLib.timeout_add(delay, self.screen_size_changed, screen)
 
     def screen_size_changed(self, screen) -> bool:
         self.screen_size_changed_timer = 0
@@ -288,9 +334,18 @@ class DisplayManager(StubServerMixin):
     def notify_screen_changed(self, screen) -> None:
         log("notify_screen_changed(%s)", screen)
         self.emit("display-geometry-changed")
-        GLib.idle_add(self.send_updated_screen_size)
+        # only schedule one update, even if we get called again before it runs:
+        if not self.send_updated_screen_size_timer:
+            self.send_updated_screen_size_timer = GLib.idle_add(self.scheduled_send_updated_screen_size)
+
+    def scheduled_send_updated_screen_size(self) -> bool:
+        self.send_updated_screen_size_timer = 0
+        self.send_updated_screen_size()
+        return False
 
     def send_updated_screen_size(self) -> None:
+        if not self._server_sources:
+            return
         root_size = self.get_display_size()
         if not root_size:
             return
@@ -323,24 +378,17 @@ class DisplayManager(StubServerMixin):
         return rrate
 
     def get_client_refresh_rate(self, ss) -> int:
-        vrefresh = []
         # use the refresh-rate value from the monitors
         # (value is pre-multiplied by 1000!)
-        if ss.monitors:
-            for mdef in ss.monitors.values():
-                v = mdef.get("refresh-rate", 0)
-                if v:
-                    vrefresh.append(v)
+        vrefresh = [v for v in (mdef.get("refresh-rate", 0) for mdef in (ss.monitors or {}).values()) if v]
         if not vrefresh and getattr(ss, "vrefresh", 0) > 0:
             vrefresh.append(ss.vrefresh * 1000)
         if not vrefresh:
             vrefresh.append(self.DEFAULT_REFRESH_RATE)
-        rrate = 0
-        if vrefresh:
-            rrate = min(vrefresh)
-            if self.refresh_rate:
-                rrate = get_refresh_rate_for_value(self.refresh_rate, rrate, multiplier=1000)
-            rrate = round(rrate / 1000)
+        rrate = min(vrefresh)
+        if self.refresh_rate:
+            rrate = get_refresh_rate_for_value(self.refresh_rate, rrate, multiplier=1000)
+        rrate = round(rrate / 1000)
         log("get_client_refresh_rate(%s)=%s (from %s)", ss, rrate, vrefresh)
         return rrate
 
@@ -349,17 +397,18 @@ class DisplayManager(StubServerMixin):
         ss = self.get_server_source(proto)
         if ss is None:
             return
+        plen = len(packet)
         width = packet.get_u16(1)
         height = packet.get_u16(2)
         ss.desktop_size = (width, height)
-        if len(packet) >= 12:
+        if plen >= 12:
             ss.set_monitors(packet[11])
-        elif len(packet) >= 11:
+        elif plen >= 11:
             # fallback to the older global attribute:
             v = packet[10]
             if 0 < v < 240 and getattr(ss, "vrefresh", 0) != v:
                 ss.vrefresh = v
-        if len(packet) >= 10:
+        if plen >= 10:
             # added in 0.16 for scaled client displays:
             xdpi = packet.get_u16(8)
             ydpi = packet.get_u16(9)
@@ -368,26 +417,26 @@ class DisplayManager(StubServerMixin):
                 log("new dpi: %ix%i", self.xdpi, self.ydpi)
                 self.dpi = round((self.xdpi + self.ydpi) / 2)
                 self.dpi_changed()
-        if len(packet) >= 8:
+        if plen >= 8:
             # added in 0.16 for scaled client displays:
             dsw = packet.get_u16(6)
             dsh = packet.get_u16(7)
             ss.desktop_size_unscaled = (dsw, dsh)
-        if len(packet) >= 6:
+        if plen >= 6:
             desktops = packet.get_u8(4)
             desktop_names = packet.get_strs(5)
             ss.set_desktops(desktops, desktop_names)
             self.calculate_desktops()
-        if len(packet) >= 4:
+        if plen >= 4:
             ss.set_screen_sizes(packet[3])
         log("client requesting new size: %sx%s", width, height)
         self.set_screen_size(width, height)
+        # this also updates the workarea:
         self.set_desktop_geometry_attributes(width, height)
-        if len(packet) >= 4:
+        if plen >= 4:
             log.info("received updated display dimensions")
             log.info("client display size is %sx%s", width, height)
             log_screen_sizes(width, height, ss.screen_sizes)
-            self.calculate_workarea(width, height)
         self.apply_refresh_rate(ss)
         # ensures that DPI and antialias information gets reset:
         self.update_all_server_settings()
@@ -465,36 +514,37 @@ class DisplayManager(StubServerMixin):
 
     def calculate_workarea(self, maxw: int, maxh: int) -> None:
         log("calculate_workarea(%s, %s)", maxw, maxh)
-        workarea = rectangle(0, 0, maxw, maxh)
-        for ss in self._server_sources.values():
-            screen_sizes = ss.screen_sizes
-            log("calculate_workarea() screen_sizes(%s)=%s", ss, screen_sizes)
-            if not screen_sizes:
-                continue
-            for display in screen_sizes:
-                # avoid error with old/broken clients:
-                if not display or not isinstance(display, (list, tuple)):
-                    continue
-                # display: [':0.0', 2560, 1600, 677, 423, [['DFP2', 0, 0, 2560, 1600, 646, 406]], 0, 0, 2560, 1574]
-                if len(display) >= 10:
-                    work_x, work_y, work_w, work_h = display[6:10]
-                    display_workarea = rectangle(work_x, work_y, work_w, work_h)
-                    log("calculate_workarea() found %s for display %s", display_workarea, display[0])
-                    workarea = workarea.intersection_rect(display_workarea)
-                    if not workarea:
-                        log.warn("Warning: failed to calculate workarea")
-                        log.warn(" as intersection of %s and %s", (maxw, maxh), (work_x, work_y, work_w, work_h))
+        # the workarea is the intersection of the workareas of all the client displays,
+        # so we only need to keep track of its edges:
+        x1, y1, x2, y2 = 0, 0, maxw, maxh
+        for work_x, work_y, work_w, work_h in get_client_workareas(self._server_sources.values()):
+            x1 = max(x1, work_x)
+            y1 = max(y1, work_y)
+            x2 = min(x2, work_x + work_w)
+            y2 = min(y2, work_y + work_h)
+            if x2 <= x1 or y2 <= y1:
+                # the intersection is empty and can only stay empty
+                break
+        width = x2 - x1
+        height = y2 - y1
         # sanity checks:
-        log("calculate_workarea(%s, %s) workarea=%s", maxw, maxh, workarea)
+        log("calculate_workarea(%s, %s) workarea=%s", maxw, maxh, (x1, y1, width, height))
         max_dim = 32768 - 8192
-        if workarea.width == 0 or workarea.height == 0 or workarea.width >= max_dim or workarea.height >= max_dim:
+        if width <= 0 or height <= 0 or width >= max_dim or height >= max_dim:
             log.warn("Warning: failed to calculate a common workarea")
             log.warn(f" using the full display area: {maxw}x{maxh}")
-            workarea = rectangle(0, 0, maxw, maxh)
-        self.set_workarea(workarea)
+            x1, y1, width, height = 0, 0, maxw, maxh
+        workarea = x1, y1, width, height
+        if workarea == self.workarea:
+            log("calculate_workarea() workarea unchanged")
+            return
+        self.set_workarea(rectangle(*workarea))
 
     def set_workarea(self, workarea) -> None:
-        """ overridden by seamless servers """
+        """
+            overridden by seamless servers,
+            which must also update `self.workarea` with the value they have set
+        """
 
     ######################################################################
     # screenshots:
@@ -519,7 +569,7 @@ class DisplayManager(StubServerMixin):
                 self.send_disconnect(proto, "screenshot failed")
                 return
             proto.send_now(packet)
-            GLib.timeout_add(5 * 1000, self.send_disconnect, proto, "screenshot sent")
+            GLib.timeout_add_seconds(5, self.send_disconnect, proto, "screenshot sent")
         except Exception as e:
             log.error("failed to capture screenshot", exc_info=True)
             self.send_disconnect(proto, "screenshot failed: %s" % e)
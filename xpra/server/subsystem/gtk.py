@@ -23,6 +23,12 @@ log = Logger("server", "gtk")
 
 get_default_window_icon_fallback = noop
 
+icon_theme = None
+# icons found in the theme, by (size, wmclass_name):
+window_icon_cache: dict[tuple[int, str], tuple[int, int, str, bytes]] = {}
+# (size, wmclass_name) pairs that have no icon in the theme:
+window_icon_misses: set[tuple[int, str]] = set()
+
 
 def gdk_init() -> None:
     log("gdk_init()")
@@ -43,9 +49,30 @@ def gdk_init() -> None:
             pass
 
 
+def clear_window_icon_cache(*_args) -> None:
+    log("clear_window_icon_cache()")
+    window_icon_cache.clear()
+    window_icon_misses.clear()
+
+
+def get_icon_theme():
+    global icon_theme
+    if icon_theme is None:
+        Gtk = gi_import("Gtk")
+        icon_theme = Gtk.IconTheme.get_default()  # pylint: disable=no-member
+        # the cached icons are no longer valid if the theme changes:
+        icon_theme.connect("changed", clear_window_icon_cache)
+    return icon_theme
+
+
 def get_default_window_icon(size: int, wmclass_name: str):
-    Gtk = gi_import("Gtk")
-    it = Gtk.IconTheme.get_default()  # pylint: disable=no-member
+    key = size, wmclass_name
+    icon = window_icon_cache.get(key)
+    if icon:
+        return icon
+    if key in window_icon_misses:
+        return get_default_window_icon_fallback(size, wmclass_name)
+    it = get_icon_theme()
     log("get_default_window_icon(%i) icon theme=%s, wmclass_name=%s", size, it, wmclass_name)
     for icon_name in (
             f"{wmclass_name}-color",
@@ -55,6 +82,9 @@ def get_default_window_icon(size: int, wmclass_name: str):
             f"{wmclass_name}-symbolic",
             f"{wmclass_name}.symbolic",
     ):
+        # `has_icon` only checks the theme index, which is much cheaper than `lookup_icon`:
+        if not it.has_icon(icon_name):
+            continue
         i = it.lookup_icon(icon_name, size, 0)
         log("lookup_icon(%s)=%s", icon_name, i)
         if not i:
@@ -65,9 +95,12 @@ def get_default_window_icon(size: int, wmclass_name: str):
             if pixbuf:
                 w, h = pixbuf.props.width, pixbuf.props.height
                 log("using '%s' pixbuf %ix%i", icon_name, w, h)
-                return w, h, "RGBA", pixbuf.get_pixels()
+                icon = w, h, "RGBA", pixbuf.get_pixels()
+                window_icon_cache[key] = icon
+                return icon
         except Exception:
             log("%s.load_icon()", i, exc_info=True)
+    window_icon_misses.add(key)
     return get_default_window_icon_fallback(size, wmclass_name)
 
 
@@ -76,8 +109,12 @@ class GTKServer(StubServerMixin):
     def __init__(self):
         StubServerMixin.__init__(self)
         self.xvfb: Popen | None = None
+        # shared with `X11DisplayManager`, so that we only verify the display once:
+        self.display_verified = False
         self.display = os.environ.get("DISPLAY", "")
         self.x11_filter = False
+        self.screen = None
+        self.screen_signal_handlers: list[int] = []
 
     def init(self, opts) -> None:
         log("GTKServer.init(..)")
@@ -98,11 +135,13 @@ class GTKServer(StubServerMixin):
 
     def setup(self) -> None:
         if is_X11():
-            from xpra.scripts.server import verify_display
-            if not verify_display(xvfb=self.xvfb, display_name=self.display):
-                from xpra.scripts.config import InitExit
-                from xpra.exit_codes import ExitCode
-                raise InitExit(ExitCode.NO_DISPLAY, f"unable to access display {self.display!r}")
+            if not self.display_verified:
+                from xpra.scripts.server import verify_display
+                if not verify_display(xvfb=self.xvfb, display_name=self.display):
+                    from xpra.scripts.config import InitExit
+                    from xpra.exit_codes import ExitCode
+                    raise InitExit(ExitCode.NO_DISPLAY, f"unable to access display {self.display!r}")
+                self.display_verified = True
             gdk_init()
             from xpra.x11.gtk.bindings import init_x11_filter
             self.x11_filter = init_x11_filter()
@@ -111,8 +150,11 @@ class GTKServer(StubServerMixin):
             Gdk = gi_import("Gdk")
             screen = Gdk.Screen.get_default()
             if screen:
-                screen.connect("size-changed", self._screen_size_changed)
-                screen.connect("monitors-changed", self._monitors_changed)
+                self.screen = screen
+                self.screen_signal_handlers = [
+                    screen.connect("size-changed", self._screen_size_changed),
+                    screen.connect("monitors-changed", self._monitors_changed),
+                ]
 
     def _screen_size_changed(self, screen) -> None:
         log(f"_screen_size_changed({screen})")
@@ -123,6 +165,13 @@ class GTKServer(StubServerMixin):
         self.schedule_screen_changed(screen)
 
     def cleanup(self) -> None:
+        screen = self.screen
+        if screen:
+            self.screen = None
+            log("cleanup() will disconnect %s", self.screen_signal_handlers)
+            for sid in self.screen_signal_handlers:
+                screen.disconnect(sid)
+            self.screen_signal_handlers = []
         if not self.x11_filter:
             return
         self.x11_filter = False
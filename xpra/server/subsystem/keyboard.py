@@ -9,7 +9,7 @@ from typing import Any
 from time import monotonic
 
 from xpra.os_util import gi_import
-from xpra.util.str_fn import bytestostr, Ellipsizer
+from xpra.util.str_fn import Ellipsizer
 from xpra.util.objects import typedict
 from xpra.common import noerr, BACKWARDS_COMPATIBLE
 from xpra.net.common import Packet
@@ -36,13 +36,17 @@ class KeyboardServer(StubServerMixin):
         # ugly: we're duplicating the value pair from "key_repeat" here:
         self.key_repeat_delay = -1
         self.key_repeat_interval = -1
+        # the device and the repeat rate we have set for it:
+        self.keyboard_repeat_applied: tuple = ()
         # store list of currently pressed keys
         # (using a dict only so we can display their names in debug messages)
         self.keys_pressed: dict[int, str] = {}
         self.keys_timedout: dict[int, float] = {}
         # timers for cancelling key repeat when we get jitter
         self.key_repeat_timer = 0
-        self.keys_pressed: dict[int, Any] = {}
+        # when the timer will fire:
+        self.key_repeat_timer_deadline = 0.0
+        self.key_repeat_pending: tuple = ()
 
     def init(self, opts) -> None:
         for option in ("sync", "layout", "layouts", "variant", "variants", "options"):
@@ -93,7 +97,7 @@ class KeyboardServer(StubServerMixin):
         device = self.keyboard_device
         if not self.readonly and device:
             info["state"] = {
-                "keys_pressed": tuple(self.keys_pressed.keys()),
+                "keys_pressed": tuple(self.keys_pressed),
                 "keycodes-down": device.get_keycodes_down(),
                 "layout-group": device.get_layout_group(),
                 "key-repeat": {
@@ -122,15 +126,17 @@ class KeyboardServer(StubServerMixin):
     def watch_keymap_changes(self) -> None:
         """ GTK servers will start listening for the 'keys-changed' signal """
 
+    def has_other_ui_clients(self, ss) -> bool:
+        return any(s is not ss and s.ui_client for s in self._server_sources.values())
+
     def parse_hello_ui_keyboard(self, ss, c: typedict) -> None:
-        other_ui_clients: list[str] = [s.uuid for s in self._server_sources.values() if s != ss and s.ui_client]
         kb_client = hasattr(ss, "keyboard_config")
         if not kb_client:
             return
         ss.keyboard_config = self.get_keyboard_config(c)  # pylint: disable=assignment-from-none
 
         delay, interval = (500, 30)
-        if not other_ui_clients:
+        if not self.has_other_ui_clients(ss):
             # so only activate this feature afterwards:
             delay, interval = c.intpair("key_repeat") or (500, 30)
             # always clear modifiers before setting a new keymap
@@ -184,9 +190,9 @@ class KeyboardServer(StubServerMixin):
         if ss is None:
             return
         log("received new keymap from client: %s", Ellipsizer(packet))
-        other_ui_clients = [s.uuid for s in self._server_sources.values() if s != ss and s.ui_client]
+        other_ui_clients = sum(1 for s in self._server_sources.values() if s is not ss and s.ui_client)
         if other_ui_clients:
-            log.warn("Warning: ignoring keymap change as there are %i other clients", len(other_ui_clients))
+            log.warn("Warning: ignoring keymap change as there are %i other clients", other_ui_clients)
             return
         kc = getattr(ss, "keyboard_config", None)
         if kc and kc.enabled:
@@ -209,9 +215,8 @@ class KeyboardServer(StubServerMixin):
         ss = self.get_server_source(proto)
         if not hasattr(ss, "keyboard_config"):
             return
-        keyname = str(keyname)
-        keystr = str(keystr)
-        modifiers = list(str(x) for x in modifiers)
+        # `get_keycode` may toggle modifiers, so we need a mutable copy:
+        modifiers = list(modifiers)
         self.set_ui_driver(ss)
         keycode, group = self.get_keycode(ss, client_keycode, keyname, pressed, modifiers, keyval, keystr, group)
         log("process_key_action(%s) server keycode=%s, group=%i", packet, keycode, group)
@@ -258,36 +263,32 @@ class KeyboardServer(StubServerMixin):
         if keycode in self.keys_timedout:
             del self.keys_timedout[keycode]
 
-        def press() -> None:
-            log("handle keycode pressing   %3i: key '%s'", keycode, name)
-            self.keys_pressed[keycode] = name
-            self.fake_key(keycode, True)
-
-        def unpress() -> None:
-            log("handle keycode unpressing %3i: key '%s'", keycode, name)
-            if keycode in self.keys_pressed:
-                del self.keys_pressed[keycode]
-            self.fake_key(keycode, False)
-
         if pressed:
             if keycode not in self.keys_pressed:
-                press()
+                log("handle keycode pressing   %3i: key '%s'", keycode, name)
+                self.keys_pressed[keycode] = name
+                self.fake_key(keycode, True)
                 if not sync and not is_mod:
                     # keyboard is not synced: client manages repeat so unpress
                     # it immediately unless this is a modifier key
                     # (as modifiers are synced via many packets: key, focus and mouse events)
-                    unpress()
+                    log("handle keycode unpressing %3i: key '%s'", keycode, name)
+                    del self.keys_pressed[keycode]
+                    self.fake_key(keycode, False)
             else:
                 log("handle keycode %s: key %s was already pressed, ignoring", keycode, name)
         else:
             if keycode in self.keys_pressed:
-                unpress()
+                log("handle keycode unpressing %3i: key '%s'", keycode, name)
+                del self.keys_pressed[keycode]
+                self.fake_key(keycode, False)
             else:
                 log("handle keycode %s: key %s was already unpressed, ignoring", keycode, name)
         if not is_mod and sync and self.key_repeat_delay > 0 and self.key_repeat_interval > 0:
             self._key_repeat(wid, pressed, name, keyval, keycode, modifiers, is_mod, self.key_repeat_delay)
 
     def cancel_key_repeat_timer(self) -> None:
+        self.key_repeat_pending = ()
         krt = self.key_repeat_timer
         if krt:
             self.key_repeat_timer = 0
@@ -295,23 +296,52 @@ class KeyboardServer(StubServerMixin):
 
     def _key_repeat(self, wid: int, pressed: bool, keyname: str, keyval: int, keycode: int,
                     modifiers: list, is_mod: bool, delay_ms: int = 0) -> None:
-        """ Schedules/cancels the key repeat timeouts """
-        self.cancel_key_repeat_timer()
-        if pressed:
-            delay_ms = min(1500, max(250, delay_ms))
-            log("scheduling key repeat timer with delay %s for %s / %s", delay_ms, keyname, keycode)
-            now = monotonic()
-            self.key_repeat_timer = GLib.timeout_add(delay_ms, self._key_repeat_timeout,
-                                                     now, delay_ms, wid, keyname, keyval, keycode, modifiers, is_mod)
+        """
+        Schedules/cancels the key repeat timeouts
+        The timer is not removed and re-added for every key event,
+        we only update `key_repeat_pending` and the timer re-arms itself if needed,
+        unless the new deadline is earlier than the timer's.
+        """
+        if not pressed:
+            self.key_repeat_pending = ()
+            return
+        delay_ms = min(1500, max(250, delay_ms))
+        log("scheduling key repeat timer with delay %s for %s / %s", delay_ms, keyname, keycode)
+        now = monotonic()
+        deadline = now + delay_ms / 1000
+        self.key_repeat_pending = (
+            deadline, now, delay_ms,
+            wid, keyname, keyval, keycode, modifiers, is_mod,
+        )
+        krt = self.key_repeat_timer
+        if krt and deadline < self.key_repeat_timer_deadline:
+            # the timer would fire too late:
+            self.key_repeat_timer = 0
+            GLib.source_remove(krt)
+        if not self.key_repeat_timer:
+            self.schedule_key_repeat_timer(delay_ms)
+
+    def schedule_key_repeat_timer(self, delay_ms: int) -> None:
+        self.key_repeat_timer_deadline = monotonic() + delay_ms / 1000
+        self.key_repeat_timer = GLib.timeout_add(delay_ms, self._key_repeat_timeout)
 
-    def _key_repeat_timeout(self, when, delay_ms: int, wid: int, keyname: str, keyval: int, keycode: int,
-                            modifiers: list, is_mod: bool) -> None:
+    def _key_repeat_timeout(self) -> bool:
         self.key_repeat_timer = 0
+        if not self.key_repeat_pending:
+            return False
+        deadline, when, delay_ms, wid, keyname, keyval, keycode, modifiers, is_mod = self.key_repeat_pending
         now = monotonic()
+        remaining = round((deadline - now) * 1000)
+        if remaining > 0:
+            # the key event was refreshed since this timer was scheduled:
+            self.schedule_key_repeat_timer(remaining)
+            return False
+        self.key_repeat_pending = ()
         log("key repeat timeout for %s / '%s' - clearing it, now=%s, scheduled at %s with delay=%s",
             keyname, keycode, now, when, delay_ms)
         self._handle_key(wid, False, keyname, keyval, keycode, modifiers, is_mod, True)
         self.keys_timedout[keycode] = now
+        return False
 
     def _process_key_repeat(self, proto, packet: Packet) -> None:
         if self.readonly:
@@ -319,26 +349,24 @@ class KeyboardServer(StubServerMixin):
         ss = self.get_server_source(proto)
         if not hasattr(ss, "keyboard_config"):
             return
+        if not ss.keyboard_config.sync:
+            # this check should be redundant: clients should not send key-repeat without
+            # having keyboard_sync enabled
+            return
         wid = packet.get_wid()
         keyname = packet.get_str(2)
         keyval = packet.get_u32(3)
         client_keycode = packet.get_u32(4)
-        modifiers = packet.get_strs(5)
-        keyname = bytestostr(keyname)
-        modifiers = [bytestostr(x) for x in modifiers]
+        modifiers = list(packet.get_strs(5))
         group = 0
         if len(packet) >= 7:
             group = packet.get_u8(6)
         keystr = ""
-        keycode, group = ss.get_keycode(client_keycode, keyname, modifiers, keyval, keystr, group)
+        keycode, group = ss.get_keycode(client_keycode, keyname, True, modifiers, keyval, keystr, group)
         if group >= 0:
             self.set_keyboard_layout_group(group)
         # key repeat uses modifiers from a pointer event, so ignore mod_pointermissing:
         ss.make_keymask_match(modifiers)
-        if not ss.keyboard_config.sync:
-            # this check should be redundant: clients should not send key-repeat without
-            # having keyboard_sync enabled
-            return
         if keycode not in self.keys_pressed:
             # the key is no longer pressed, has it timed out?
             when_timedout = self.keys_timedout.get(keycode, None)
@@ -378,20 +406,32 @@ class KeyboardServer(StubServerMixin):
             return
         # make sure the timer doesn't fire and interfere:
         self.cancel_key_repeat_timer()
-        keycodes = tuple(self.keys_pressed.keys())
+        # most of the time, there are no keys pressed:
+        keycodes = tuple(self.keys_pressed) if self.keys_pressed else ()
         self.keyboard_device.clear_keys_pressed(keycodes)
         self.keys_pressed = {}
 
     def set_keyboard_layout_group(self, grp: int) -> None:
         """ overriden in x11 keyboard """
 
-    def set_keyboard_repeat(self, delay: int, interval: int) -> None:
+    def set_keyboard_repeat(self, delay: int, interval: int, force: bool = False) -> None:
         self.key_repeat_delay = delay
         self.key_repeat_interval = interval
         device = self.keyboard_device
         if not device:
             return
+        # compare with the device's current rate if we can,
+        # since it may have been modified by the session (ie: `xset r rate`):
+        get_repeat_rate = getattr(device, "get_repeat_rate", None)
+        if get_repeat_rate:
+            applied = (device, *(get_repeat_rate() or ()))
+        else:
+            applied = self.keyboard_repeat_applied
+        if not force and applied == (device, delay, interval):
+            log("set_keyboard_repeat(%i, %i) unchanged", delay, interval)
+            return
         device.set_repeat_rate(delay, interval)
+        self.keyboard_repeat_applied = (device, delay, interval)
 
     def get_keyboard_config(self, props=None) -> Any | None:
         log("get_keyboard_config(%s) is not implemented", props)
@@ -4,11 +4,17 @@
 # later version. See the file COPYING for details.
 
 import os
+import sys
+import json
+import platform
+from time import time
+from glob import glob
+from hashlib import sha256
 from typing import Any
 
 from xpra.util.objects import typedict
 from xpra.util.str_fn import bytestostr
-from xpra.util.env import OSEnvContext
+from xpra.util.env import OSEnvContext, envbool, envint, osexpand
 from xpra.util.version import parse_version, dict_version_trim
 from xpra.util.parsing import TRUE_OPTIONS, FALSE_OPTIONS
 from xpra.common import FULL_INFO
@@ -17,54 +23,151 @@ from xpra.log import Logger
 
 log = Logger("opengl")
 
+OPENGL_CACHE = envbool("XPRA_OPENGL_CACHE", False)
+# failed probes are only cached for this long (in seconds):
+OPENGL_CACHE_ERROR_TTL = envint("XPRA_OPENGL_CACHE_ERROR_TTL", 3600)
+# kill the probe command if it takes longer than this (in seconds):
+OPENGL_PROBE_TIMEOUT = envint("XPRA_OPENGL_PROBE_TIMEOUT", 10)
+
+# probe output values that are parsed as versions:
+VERSION_KEYS = frozenset(("GLX", "GLU.version", "opengl", "pyopengl", "accelerate", "shading-language-version"))
+
+
+def get_pyopengl_version() -> str:
+    # without importing it:
+    from importlib.metadata import version, PackageNotFoundError
+    try:
+        return version("PyOpenGL")
+    except PackageNotFoundError:
+        return ""
+
+
+def get_opengl_fingerprint(display_name: str) -> str:
+    """
+    Identifies the display, GPU, GL driver and software versions that an OpenGL probe result applies to.
+    """
+    from xpra import __version__
+    parts = [
+        display_name, os.environ.get("XDG_SESSION_TYPE", ""),
+        # the probe results also depend on the software versions:
+        __version__, sys.version, get_pyopengl_version(), platform.release(),
+    ]
+    for filename in sorted(
+        glob("/sys/class/drm/card*/device/vendor") + glob("/sys/class/drm/card*/device/device")
+        # out of tree kernel drivers (ie: nvidia) have their own version:
+        + glob("/sys/class/drm/card*/device/driver/module/version")
+    ):
+        try:
+            with open(filename, encoding="latin1") as f:
+                parts.append(f"{filename}={f.read().strip()}")
+        except OSError:
+            pass
+    for filename in sorted(glob("/usr/lib*/libGL*") + glob("/usr/lib*/*/libGL*")):
+        try:
+            parts.append(f"{filename}={os.stat(filename).st_mtime}")
+        except OSError:
+            pass
+    return sha256("\n".join(parts).encode()).hexdigest()[:16]
+
+
+def get_opengl_cache_dir() -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME", "") or os.path.join("~", ".cache")
+    return osexpand(os.path.join(cache_home, "xpra"))
+
+
+def get_opengl_cache_filename(display_name: str) -> str:
+    return os.path.join(get_opengl_cache_dir(), f"opengl-{get_opengl_fingerprint(display_name)}.json")
+
+
+def load_opengl_cache(filename: str) -> dict[str, Any]:
+    try:
+        with open(filename, encoding="utf8") as f:
+            props = json.load(f)
+        mtime = os.stat(filename).st_mtime
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        log("load_opengl_cache(%r)", filename, exc_info=True)
+        log.warn(f"Warning: ignoring invalid OpenGL cache file {filename!r}")
+        log.warn(f" {e}")
+        return {}
+    if not isinstance(props, dict):
+        return {}
+    if "error" in props and time() - mtime > OPENGL_CACHE_ERROR_TTL:
+        log("load_opengl_cache(%r) ignoring stale error %r", filename, props["error"])
+        return {}
+    # json does not preserve tuples, which we use for versions:
+    return {k: tuple(v) if isinstance(v, list) else v for k, v in props.items()}
+
+
+def save_opengl_cache(filename: str, props: dict[str, Any]) -> None:
+    tmp = f"{filename}.tmp"
+    try:
+        os.makedirs(os.path.dirname(filename), mode=0o700, exist_ok=True)
+        with open(tmp, "w", encoding="utf8") as f:
+            json.dump(props, f)
+        os.replace(tmp, filename)
+    except (OSError, TypeError, ValueError) as e:
+        log("save_opengl_cache(%r, %s)", filename, props, exc_info=True)
+        log.warn(f"Warning: failed to save the OpenGL cache file {filename!r}")
+        log.warn(f" {e}")
+
+
+def log_opengl_props(props: dict[str, Any], display_name: str) -> None:
+    log("opengl props=%s", props)
+    if props:
+        glprops = typedict(props)
+        if glprops.strget("success").lower() in TRUE_OPTIONS:
+            log.info(f"OpenGL is supported on display {display_name!r}")
+            renderer = glprops.strget("renderer").split(";")[0]
+            if renderer:
+                log.info(f" using {renderer!r} renderer")
+        else:
+            log.info("OpenGL is not supported on this display")
+            probe_err = glprops.strget("error")
+            if probe_err:
+                log.info(f" {probe_err}")
+    else:
+        log.info("No OpenGL information available")
+
+
+def parse_opengl_prop(k: str, v: str) -> Any:
+    if k in VERSION_KEYS:
+        return parse_version(v)
+    return v
+
 
 def run_opengl_probe(cmd: list[str], env: dict[str, str], display_name: str):
     props: dict[str, Any] = {}
     try:
         # pylint: disable=import-outside-toplevel
-        from subprocess import Popen, PIPE
+        from subprocess import Popen, PIPE, TimeoutExpired
         # we want the output so we can parse it:
         env["XPRA_REDIRECT_OUTPUT"] = "0"
         log(f"query_opengl() using {cmd=}, {env=}")
         proc = Popen(cmd, stdin=PIPE, stdout=PIPE, stderr=PIPE, env=env)
-        out, err = proc.communicate()
+        try:
+            out, err = proc.communicate(timeout=OPENGL_PROBE_TIMEOUT)
+        except TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            raise RuntimeError(f"probe timed out after {OPENGL_PROBE_TIMEOUT} seconds") from None
         log("out(%s)=%s", cmd, out)
         log("err(%s)=%s", cmd, err)
         if proc.returncode == 0:
             # parse output:
-            for line in out.splitlines():
-                parts = bytestostr(line).split("=")
-                if len(parts) != 2:
+            for line in bytestostr(out).splitlines():
+                k, sep, v = line.partition("=")
+                if not sep:
                     continue
-                k = parts[0].strip()
-                v = parts[1].strip()
-                if k in ("GLX", "GLU.version", "opengl", "pyopengl", "accelerate", "shading-language-version"):
-                    props[k] = parse_version(v)
-                else:
-                    props[k] = v
-            log("opengl props=%s", props)
-            if props:
-                glprops = typedict(props)
-                if glprops.strget("success").lower() in TRUE_OPTIONS:
-                    log.info(f"OpenGL is supported on display {display_name!r}")
-                    renderer = glprops.strget("renderer").split(";")[0]
-                    if renderer:
-                        log.info(f" using {renderer!r} renderer")
-                else:
-                    log.info("OpenGL is not supported on this display")
-                    probe_err = glprops.strget("error")
-                    if probe_err:
-                        log.info(f" {probe_err}")
-            else:
-                log.info("No OpenGL information available")
+                k = k.strip()
+                props[k] = parse_opengl_prop(k, v.strip())
+            log_opengl_props(props, display_name)
         else:
             error = bytestostr(err).strip("\n\r")
-            for x in str(err).splitlines():
-                if x.startswith("RuntimeError: "):
-                    error = x[len("RuntimeError: "):]
-                    break
-                if x.startswith("ImportError: "):
-                    error = x[len("ImportError: "):]
+            for x in error.splitlines():
+                if x.startswith(("RuntimeError: ", "ImportError: ")):
+                    error = x.split(": ", 1)[1]
                     break
             props["error"] = error
             log.warn("Warning: OpenGL support check failed:")
@@ -118,6 +221,12 @@ class OpenGLInfo(StubServerMixin):
         self.opengl = opts.opengl
 
     def threaded_setup(self) -> None:
+        # don't make the server wait for the probe,
+        # clients that connect before it completes just won't get the `opengl` capabilities:
+        from xpra.util.thread import start_thread
+        start_thread(self.probe_opengl_props, "opengl-probe", daemon=True)
+
+    def probe_opengl_props(self) -> None:
         self.opengl_props = self.query_opengl()
 
     def query_opengl(self) -> dict[str, Any]:
@@ -125,6 +234,20 @@ class OpenGLInfo(StubServerMixin):
         if self.opengl.lower() == "noprobe" or self.opengl.lower() in FALSE_OPTIONS:
             log("query_opengl() skipped because opengl=%s", self.opengl)
             return props
+        cache_filename = ""
+        if OPENGL_CACHE:
+            cache_filename = get_opengl_cache_filename(self.display)
+            props = load_opengl_cache(cache_filename)
+            log("query_opengl() cached props from %r: %s", cache_filename, props)
+            if props:
+                log_opengl_props(props, self.display)
+                return props
+        props = self.probe_opengl()
+        if cache_filename and props:
+            save_opengl_cache(cache_filename, props)
+        return props
+
+    def probe_opengl(self) -> dict[str, Any]:
         err = load_opengl()
         if err:
             return err
@@ -79,12 +79,10 @@ cdef class rectangle:
             or None
         """
         cdef int ix = MAX(self.x, x)
-        cdef int iw = MIN(self.x+self.width, x+w) - ix
-        if iw<=0:
-            return None
         cdef int iy = MAX(self.y, y)
+        cdef int iw = MIN(self.x+self.width, x+w) - ix
         cdef int ih = MIN(self.y+self.height, y+h) - iy
-        if ih<=0:
+        if iw<=0 or ih<=0:
             return None
         return rectangle(ix, iy, iw, ih)
 
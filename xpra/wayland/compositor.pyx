@@ -113,7 +113,8 @@ def remove_event_listener(event_name: str, callback: Callable) -> None:
 def emit(event_name: str, *args) -> None:
     global event_listeners
     callbacks = event_listeners.get(event_name, ())
-    log("emit%s callbacks=%s", Ellipsizer(tuple([event_name] + list(args))), callbacks)
+    if log.is_debug_enabled():
+        log("emit%s callbacks=%s", Ellipsizer((event_name, ) + args), callbacks)
     for callback in callbacks:
         callback(*args)
 
@@ -72,27 +72,29 @@ class WaylandSeamlessServer(GObject.GObject, ServerBase):
     def get_clipboard_class():
         return None  # TODO: WaylandClipboard
 
-    def get_surface(self, wid: int) -> int:
+    def get_window_surface(self, wid: int) -> tuple[Window | None, int]:
         window = self._id_to_window.get(wid)
         if not window:
-            return 0
-        return window._gproperties.get("surface", 0)
+            return None, 0
+        return window, window._gproperties.get("surface", 0)
+
+    def get_surface(self, wid: int) -> int:
+        return self.get_window_surface(wid)[1]
 
     def _focus(self, _server_source, wid: int, modifiers) -> None:
         log("_focus(%s, %s) current focus=%i", wid, modifiers, self.focused)
         if self.focused == wid:
             return
-        for window_id, state in {
-            self.focused: False,        # unfocus
-            wid: True,                  # focus
-        }.items():
+        for window_id, state in (
+            (self.focused, False),      # unfocus
+            (wid, True),                # focus
+        ):
             if not window_id:
                 if state:
                     # focus now goes nowhere:
                     self.keyboard_device.focus(0)
                 continue
-            window = self._id_to_window.get(window_id)
-            surface = self.get_surface(window_id)
+            window, surface = self.get_window_surface(window_id)
             log("focus: wid=%#x, state=%s, window=%s, surface=%#x", window_id, state, window, surface)
             if window and surface:
                 self.compositor.focus(surface, state)
@@ -127,8 +129,8 @@ class WaylandSeamlessServer(GObject.GObject, ServerBase):
         self.compositor.flush()
 
     def do_process_mouse_common(self, proto, device_id: int, wid: int, pointer, props) -> bool:
-        self.set_pointer_focus(wid, pointer)
-        log("pointer: %r",pointer)
+        if self.pointer_focus != wid:
+            self.set_pointer_focus(wid, pointer)
         try:
             return super().do_process_mouse_common(proto, device_id, wid, pointer, props)
         finally:
@@ -136,8 +138,7 @@ class WaylandSeamlessServer(GObject.GObject, ServerBase):
 
     def _process_map_window(self, proto, packet: Packet) -> None:
         wid = packet.get_wid()
-        window = self._id_to_window.get(wid)
-        surface = self.get_surface(wid)
+        window, surface = self.get_window_surface(wid)
         if not (window and surface):
             return
         w = packet.get_i16(4)
@@ -148,8 +149,7 @@ class WaylandSeamlessServer(GObject.GObject, ServerBase):
 
     def _process_configure_window(self, proto, packet: Packet) -> None:
         wid = packet.get_wid()
-        window = self._id_to_window.get(wid)
-        surface = self.get_surface(wid)
+        window, surface = self.get_window_surface(wid)
         if not (window and surface):
             return
         w = packet.get_u16(4)
@@ -244,16 +244,14 @@ class WaylandSeamlessServer(GObject.GObject, ServerBase):
         if not window:
             return
         self.update_size(window, size)
-        options = {
-            "damage": True,
-        }
         last = len(rects) - 1
         for i, (x, y, w, h) in enumerate(rects):
-            options["more"] = i != last
-            self.refresh_window_area(window, x, y, w, h, options=options)
+            # use a new options dict for each rectangle, so the `more` flag is never aliased:
+            self.refresh_window_area(window, x, y, w, h, options={"damage": True, "more": i != last})
 
     def update_size(self, window, size: tuple[int, int]) -> None:
-        old_geom = window.get_property("geometry")
+        # called for every commit, so bypass the GObject property getter:
+        old_geom = window._gproperties["geometry"]
         w, h = size
         if old_geom[2] == w and old_geom[3] == h:
             return
@@ -321,7 +319,7 @@ class WaylandSeamlessServer(GObject.GObject, ServerBase):
         log("wayland_io_callback%s", (fd, condition))
         if condition & GLib.IO_IN:
             self.compositor.process_events()
-        elif condition & GLib.IO_ERR:
+        if condition & GLib.IO_ERR:
             log.error("Error: IO_ERR on wayland compositor fd %i", fd)
         return GLib.SOURCE_CONTINUE
 
@@ -10,7 +10,7 @@ from collections.abc import Callable, Sequence
 from xpra.x11.bindings.xlib cimport (
     Time, Status, Atom, Window,
     XInternAtom, XInternAtoms,
-    XGetAtomName,
+    XGetAtomName, XGetAtomNames,
     XFree,
     XGetErrorText,
     XQueryPointer,
@@ -339,22 +339,27 @@ cdef class X11CoreBindingsInstance:
             return <Atom> str_or_int
         return self.str_to_atom(str_or_int)
 
-    def intern_atoms(self, atom_names: Sequence[str]) -> None:
+    def intern_atoms(self, atom_names: Sequence[str]) -> Sequence[int]:
         cdef int count = len(atom_names)
         cdef char** names = <char **> malloc(sizeof(uintptr_t)*(count+1))
         assert names!=NULL
         cdef Atom* atoms_return = <Atom*> malloc(sizeof(Atom)*(count+1))
         assert atoms_return!=NULL
         from ctypes import create_string_buffer, addressof
-        str_names = [create_string_buffer(x.encode("latin1")) for x in atom_names]
+        str_names = [create_string_buffer(strtobytes(x)) for x in atom_names]
         cdef uintptr_t ptr
         for i, x in enumerate(str_names):
             ptr = addressof(x)
             names[i] = <char*> ptr
         cdef Status s = XInternAtoms(self.display, names, count, 0, atoms_return)
+        atoms = []
+        if s!=0:
+            for i in range(count):
+                atoms.append(atoms_return[i])
         free(names)
         free(atoms_return)
         assert s!=0, "failed to intern some atoms"
+        return tuple(atoms)
 
     def get_xatom(self, str_or_int) -> Atom:
         return self.xatom(str_or_int)
@@ -373,6 +378,46 @@ cdef class X11CoreBindingsInstance:
         bin_name = self.XGetAtomName(atom)
         return bin_name.decode("latin1")
 
+    def get_xatoms(self, atom_names: Sequence) -> Sequence[int]:
+        """ same as `get_xatom` for multiple names or atoms, using a single `XInternAtoms` round-trip """
+        self.context_check("XInternAtoms")
+        # integers are assumed to already be X atoms:
+        str_names = [x for x in atom_names if not isinstance(x, int)]
+        if not str_names:
+            return tuple(atom_names)
+        interned = iter(self.intern_atoms(str_names))
+        return tuple(x if isinstance(x, int) else next(interned) for x in atom_names)
+
+    def get_atom_names(self, atoms: Sequence[int]) -> Sequence[str]:
+        """ same as `get_atom_name` for multiple atoms, using a single `XGetAtomNames` round-trip """
+        self.context_check("XGetAtomNames")
+        cdef int count = len(atoms)
+        if count == 0:
+            return ()
+        cdef Atom* atoms_array = <Atom*> malloc(sizeof(Atom)*count)
+        assert atoms_array!=NULL
+        cdef char** names_return = <char **> malloc(sizeof(uintptr_t)*count)
+        assert names_return!=NULL
+        cdef char *v
+        cdef int i
+        for i in range(count):
+            atoms_array[i] = atoms[i]
+            names_return[i] = NULL
+        names = []
+        try:
+            XGetAtomNames(self.display, atoms_array, count, names_return)
+            for i in range(count):
+                v = names_return[i]
+                if v == NULL:
+                    names.append("")
+                    continue
+                names.append(v[:].decode("latin1"))
+                XFree(v)
+        finally:
+            free(atoms_array)
+            free(names_return)
+        return tuple(names)
+
     def get_error_text(self, code) -> str:
         if self.display == NULL:
             raise RuntimeError("display is closed")
@@ -94,6 +94,7 @@ cdef extern from "X11/Xlib.h":
     Atom XInternAtom(Display * display, char * atom_name, Bool only_if_exists)
     Status XInternAtoms(Display *display, char **names, int count, Bool only_if_exists, Atom *atoms_return)
     char *XGetAtomName(Display *display, Atom atom)
+    Status XGetAtomNames(Display *display, Atom *atoms, int count, char **names_return)
 
     int XFree(void * data)
     int XKillClient(Display *, XID)
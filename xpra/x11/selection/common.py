@@ -4,6 +4,7 @@
 # later version. See the file COPYING for details.
 
 import struct
+from array import array
 from typing import Sequence, Iterable
 
 from xpra.util.str_fn import repr_ellipsized
@@ -21,20 +22,25 @@ def xatoms_to_strings(data: bytes) -> Sequence[str]:
     length = len(data)
     if length % sizeof_long != 0:
         raise ValueError(f"invalid length for atom array: {length}, value={repr_ellipsized(data)}")
-    natoms = length // sizeof_long
-    atoms = struct.unpack(b"@" + b"L" * natoms, data)
+    # native unsigned longs, same as `struct.unpack("@L"*natoms, data)`:
+    atoms = tuple(atom for atom in array("L", data) if atom)
+    if not atoms:
+        return ()
     with xsync:
         from xpra.x11.bindings.window import X11WindowBindings
         X11Window = X11WindowBindings()
-        return tuple(name for name in (X11Window.get_atom_name(atom) for atom in atoms if atom) if name)
+        return tuple(name for name in X11Window.get_atom_names(atoms) if name)
 
 
 def strings_to_xatoms(data: Iterable[str]) -> bytes:
+    names = tuple(atom for atom in data if atom)
+    if not names:
+        return b""
     with xsync:
         from xpra.x11.bindings.window import X11WindowBindings
         X11Window = X11WindowBindings()
-        atom_array = tuple(X11Window.get_xatom(atom) for atom in data if atom)
-    return struct.pack(b"@" + b"L" * len(atom_array), *atom_array)
+        atom_array = array("L", X11Window.get_xatoms(names))
+    return atom_array.tobytes()
 
 
 def log_xfixes_error(msg: str) -> None:
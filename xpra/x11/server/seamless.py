@@ -190,6 +190,8 @@ class SeamlessServer(GObject.GObject, ServerBase):
 
     def init_wm(self) -> None:
         from xpra.x11.selection.common import AlreadyOwned
+        # the window manager resets the workarea when it acquires its selection:
+        self._wm.connect("workarea-reset", self._workarea_reset)
         # Create the WM object
         x11_errors = []
         while True:
@@ -376,9 +378,15 @@ class SeamlessServer(GObject.GObject, ServerBase):
         from xpra.x11.xroot_props import set_desktop_list
         set_desktop_list(names)
 
+    def _workarea_reset(self, _wm) -> None:
+        # the next `calculate_workarea` call must not be skipped:
+        self.workarea = (0, 0, 0, 0)
+
     def set_workarea(self, workarea) -> None:
         from xpra.x11.xroot_props import set_workarea
         set_workarea(workarea.x, workarea.y, workarea.width, workarea.height)
+        # this is the value `calculate_workarea` compares with, whoever calls us:
+        self.workarea = (workarea.x, workarea.y, workarea.width, workarea.height)
 
     def set_desktop_geometry(self, width: int, height: int) -> None:
         wm = self._wm
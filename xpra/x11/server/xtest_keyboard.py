@@ -57,6 +57,12 @@ class XTestKeyboardDevice:
         with xlog:
             X11Keyboard.set_key_repeat_rate(delay, interval)
 
+    @staticmethod
+    def get_repeat_rate() -> tuple[int, int] | None:
+        with xlog:
+            return X11Keyboard.get_key_repeat_rate()
+        return None
+
     @staticmethod
     def get_keycodes_down() -> Sequence[int]:
         with xlog:
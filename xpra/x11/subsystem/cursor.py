@@ -16,6 +16,8 @@ from xpra.log import Logger
 
 log = Logger("x11", "server", "cursor")
 
+DEFAULT_CURSOR_SIZE = 32
+
 
 class XCursorServer(CursorManager):
     __signals__ = {
@@ -25,6 +27,8 @@ class XCursorServer(CursorManager):
     def __init__(self):
         CursorManager.__init__(self)
         self.last_cursor_serial = 0
+        self.xfixes = None
+        self.x11_cursor = None
 
     def setup(self) -> None:
         log("setup() cursors=%s", self.cursors)
@@ -44,20 +48,28 @@ class XCursorServer(CursorManager):
                 self.cursors = False
                 return
             XFixes.selectCursorChange(True)
-            self.default_cursor_image = XFixes.get_cursor_image()
+            self.xfixes = XFixes
+            self.default_cursor_image = dci = XFixes.get_cursor_image()
+            self.default_cursor_pixels = dci[7] if dci and len(dci) >= 8 else None
             log("get_default_cursor=%s", Ellipsizer(self.default_cursor_image))
             from xpra.x11.bindings.core import get_root_xid
             rxid = get_root_xid()
             add_event_receiver(rxid, self)
+        try:
+            from xpra.x11.bindings.cursor import X11CursorBindings
+            self.x11_cursor = X11CursorBindings()
+        except ImportError as e:
+            log.warn("Warning: missing X11 cursor bindings")
+            log.warn(" %s", e)
+            log.warn(" using default cursor size %i", DEFAULT_CURSOR_SIZE)
 
     # noinspection PyMethodMayBeStatic
     def get_cursor_image(self) -> Sequence:
-        if not self.cursors:
+        if not self.cursors or not self.xfixes:
             return ()
         # must be called from the UI thread!
         with xlog:
-            from xpra.x11.bindings.fixes import XFixesBindings
-            return XFixesBindings().get_cursor_image()
+            return self.xfixes.get_cursor_image()
 
     def get_cursor_data(self, skip_default=True) -> tuple[Any, Any]:
         # must be called from the UI thread!
@@ -70,20 +82,12 @@ class XCursorServer(CursorManager):
         self.last_cursor_image = list(cursor_image)
         pixels = self.last_cursor_image[7]
         log("get_cursor_image() cursor=%s", cursor_image[:7] + ["%s bytes" % len(pixels)] + cursor_image[8:])
-        is_default = self.default_cursor_image is not None and str(pixels) == str(self.default_cursor_image[7])
+        is_default = pixels == self.default_cursor_pixels
         if skip_default and is_default:
             log("get_cursor_data(): default cursor - clearing it")
             cursor_image = None
-        try:
-            from xpra.x11.bindings.cursor import X11CursorBindings
-            size = X11CursorBindings().get_default_cursor_size()
-        except ImportError as e:
-            size = 32
-            from xpra.util.env import first_time
-            if first_time("x11-cursor"):
-                log.warn("Warning: missing X11 cursor bindings")
-                log.warn(" %s", e)
-                log.warn(" using default cursor size %i", size)
+        x11_cursor = self.x11_cursor
+        size = x11_cursor.get_default_cursor_size() if x11_cursor else DEFAULT_CURSOR_SIZE
         return cursor_image, (size, (32767, 32767))
 
     def do_x11_cursor_event(self, event: X11Event) -> None:
@@ -18,7 +18,7 @@ from xpra.util.system import is_X11
 from xpra.scripts.config import FALSE_OPTIONS, InitExit
 from xpra.net.common import Packet
 from xpra.common import (
-    get_refresh_rate_for_value, parse_env_resolutions, parse_resolutions,
+    parse_env_resolutions, parse_resolutions,
     MAX_WINDOW_SIZE, NotificationID, BACKWARDS_COMPATIBLE,
 )
 from xpra.x11.xroot_props import root_set, root_get, root_del
@@ -117,6 +117,8 @@ class X11DisplayManager(DisplayManager):
     def __init__(self):
         DisplayManager.__init__(self)
         self.xvfb: Popen | None = None
+        # shared with `GTKServer`, so that we only verify the display once:
+        self.display_verified = False
         self.display_pid: int = 0
         self.randr_sizes_added: list[tuple[int, int]] = []
         self.initial_resolutions: Sequence[tuple[int, int, int]] = ()
@@ -169,9 +171,11 @@ class X11DisplayManager(DisplayManager):
 
     def setup(self) -> None:
         self.check_xvfb()
-        from xpra.scripts.server import verify_display
-        if not verify_display(xvfb=self.xvfb, display_name=self.display):
-            raise InitExit(ExitCode.NO_DISPLAY, f"unable to access display {self.display!r}")
+        if not self.display_verified:
+            from xpra.scripts.server import verify_display
+            if not verify_display(xvfb=self.xvfb, display_name=self.display):
+                raise InitExit(ExitCode.NO_DISPLAY, f"unable to access display {self.display!r}")
+            self.display_verified = True
         self.session_files += [
             "xvfb.pid",
             "xauthority",
@@ -205,12 +209,16 @@ class X11DisplayManager(DisplayManager):
                 log_randr_warning("randr extension is not available")
                 self.randr = False
                 return False
-            # check the property first,
-            # because we may be inheriting this display,
-            # in which case the screen sizes list may be longer than 1
-            eprop = _get_root_int("_XPRA_RANDR_EXACT_SIZE")
-            log("_XPRA_RANDR_EXACT_SIZE=%s", eprop)
-            self.randr_exact_size = eprop == 1 or RandR.get_version() >= (1, 6)
+            # the version is recorded when the bindings are initialized,
+            # so checking it first avoids a round trip for the property:
+            self.randr_exact_size = RandR.get_version() >= (1, 6)
+            if not self.randr_exact_size:
+                # check the property before the sizes,
+                # because we may be inheriting this display,
+                # in which case the screen sizes list may be longer than 1
+                eprop = _get_root_int("_XPRA_RANDR_EXACT_SIZE")
+                log("_XPRA_RANDR_EXACT_SIZE=%s", eprop)
+                self.randr_exact_size = eprop == 1
             if not self.randr_exact_size:
                 # ugly hackish way of detecting Xvfb with randr,
                 # assume that it has only one resolution pre-defined:
@@ -224,7 +232,7 @@ class X11DisplayManager(DisplayManager):
                     self.randr_exact_size = False
             log(f"randr enabled: {self.randr}, exact size={self.randr_exact_size}")
             if not self.randr:
-                log.warn("Warning: no X11 RandR support on %r", os.environ.get("DISPLAY", ""))
+                log.warn("Warning: no X11 RandR support on %r", self.display)
         return self.randr
 
     def set_initial_resolution(self) -> None:
@@ -274,9 +282,6 @@ class X11DisplayManager(DisplayManager):
             return X11Window.get_depth(rxid)
         return 0
 
-    def get_refresh_rate_for_value(self, invalue) -> int:
-        return get_refresh_rate_for_value(self.refresh_rate, invalue)
-
     def get_info(self, proto) -> dict[str, Any]:
         info = DisplayManager.get_info(self, proto)
         dinfo = info["display"]
@@ -60,6 +60,9 @@ class ICCServer(StubServerMixin):
         for x in ("data", "icc-data", "icc-profile"):
             data = icc.bytesget(x)
             if data:
+                if data == self.icc_profile:
+                    log("set_icc_profile() icc data unchanged for %s", ui_clients[0])
+                    return
                 log("set_icc_profile() icc data for %s: %s (%i bytes)", ui_clients[0], hexstr(data), len(data))
                 self.icc_profile = data
                 root_set("_ICC_PROFILE", ["u32"], data)
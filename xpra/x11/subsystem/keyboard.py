@@ -17,7 +17,7 @@ from xpra.util.env import envbool
 from xpra.util.io import find_libexec_command, which
 from xpra.util.objects import typedict
 from xpra.server.subsystem.keyboard import KeyboardServer
-from xpra.x11.error import xsync, xswallow, xlog
+from xpra.x11.error import xsync, xswallow, xlog, XError
 from xpra.log import Logger
 
 log = Logger("x11", "server", "keyboard")
@@ -27,6 +27,7 @@ GLib = gi_import("GLib")
 
 IBUS_DAEMON_COMMAND = os.environ.get("XPRA_IBUS_DAEMON_COMMAND",
                                      "ibus-daemon --xim --verbose --replace --panel=disable --desktop=xpra")
+IBUS_DAEMON_ARGV = tuple(shlex.split(IBUS_DAEMON_COMMAND))
 EXPOSE_IBUS_LAYOUTS = envbool("XPRA_EXPOSE_IBUS_LAYOUTS", True)
 
 
@@ -42,9 +43,9 @@ def configure_imsettings_env(input_method: str) -> str:
         pass
     elif im in ("xim", "ibus", "scim", "uim"):
         # ie: (False, "ibus", "ibus", "IBus", "@im=ibus")
-        imsettings_env(True, im.lower(), im.lower(), im.lower(), im, "@im=" + im.lower())
+        imsettings_env(True, im, im, im, im, f"@im={im}")
     else:
-        v = imsettings_env(True, im.lower(), im.lower(), im.lower(), im, "@im=" + im.lower())
+        v = imsettings_env(True, im, im, im, im, f"@im={im}")
         ibuslog.warn(f"using input method settings: {v}")
         ibuslog.warn(f"unknown input method specified: {input_method}")
         ibuslog.warn(" if it is correct, you may want to file a bug to get it recognized")
@@ -55,10 +56,12 @@ def imsettings_env(disabled, gtk_im_module, qt_im_module, clutter_im_module,
                    imsettings_module, xmodifiers) -> dict[str, str]:
     # for more information, see imsettings:
     # https://code.google.com/p/imsettings/source/browse/trunk/README
+    env = os.environ
     if disabled is True:
-        os.environ["DISABLE_IMSETTINGS"] = "1"  # this should override any XSETTINGS too
-    elif disabled is False and ("DISABLE_IMSETTINGS" in os.environ):
-        del os.environ["DISABLE_IMSETTINGS"]
+        if env.get("DISABLE_IMSETTINGS") != "1":
+            env["DISABLE_IMSETTINGS"] = "1"  # this should override any XSETTINGS too
+    elif disabled is False and ("DISABLE_IMSETTINGS" in env):
+        del env["DISABLE_IMSETTINGS"]
     v = {
         "GTK_IM_MODULE": gtk_im_module,  # or "gtk-im-context-simple"?
         "QT_IM_MODULE": qt_im_module,  # or "simple"?
@@ -70,7 +73,10 @@ def imsettings_env(disabled, gtk_im_module, qt_im_module, clutter_im_module,
         # "IMSETTINGS_DISABLE_DESKTOP_CHECK"    : "true",
         # "IMSETTINGS_INTEGRATE_DESKTOP"        : "no"           #we're not a real desktop
     }
-    os.environ.update(v)
+    # only modify the values that have changed:
+    for k, value in v.items():
+        if env.get(k) != value:
+            env[k] = value
     return v
 
 
@@ -85,14 +91,10 @@ def may_start_ibus(env: dict[str, str]):
     pidfile = ibus_pid_file()
     ibus_daemon_pid = load_pid(pidfile)
     ibuslog(f"may_start_ibus({env}) {ibus_daemon_pid=}, {pidfile=!r}, {daemonizer=!r}")
-    pidfile_exists = os.path.exists(pidfile)
-    pid_exists = os.path.exists(f"/proc/{ibus_daemon_pid}")
-    if ibus_daemon_pid and pid_exists:
-        pid = load_pid(pidfile)
-        if pid > 0:
-            ibuslog(f"ibus-daemon is already running with pid {pid!r}")
-            return
-    if pidfile_exists and os.path.exists("/proc"):
+    if ibus_daemon_pid > 0 and os.path.isdir(f"/proc/{ibus_daemon_pid}"):
+        ibuslog(f"ibus-daemon is already running with pid {ibus_daemon_pid!r}")
+        return
+    if os.path.exists(pidfile) and os.path.exists("/proc"):
         try:
             os.unlink(pidfile)
         except OSError as e:
@@ -103,7 +105,7 @@ def may_start_ibus(env: dict[str, str]):
 
     # start it late:
     def late_start():
-        command = shlex.split(IBUS_DAEMON_COMMAND)
+        command = list(IBUS_DAEMON_ARGV)
         ibuslog(f"starting ibus: {IBUS_DAEMON_COMMAND!r}")
         if daemonizer:
             ibuslog(" using daemonizer: %r", daemonizer)
@@ -151,6 +153,7 @@ class X11KeyboardServer(KeyboardServer):
         KeyboardServer.__init__(self)
         self.readonly = False
         self.xkb = False
+        self.x11_keyboard = None
         self.input_method = "keep"
         self.ibus_layouts: dict[str, Any] = {}
         self.current_keyboard_group = 0
@@ -159,7 +162,7 @@ class X11KeyboardServer(KeyboardServer):
         super().init(opts)
         im = opts.input_method.lower()
         if im == "auto":
-            ibus_daemon = which(IBUS_DAEMON_COMMAND.split(" ")[0])      # ie: "ibus-daemon"
+            ibus_daemon = which(IBUS_DAEMON_ARGV[0]) if IBUS_DAEMON_ARGV else ""      # ie: "ibus-daemon"
             if ibus_daemon:
                 im = "ibus"
             else:
@@ -194,6 +197,7 @@ class X11KeyboardServer(KeyboardServer):
             with xlog:
                 XTest = XTestBindings()
                 X11Keyboard = X11KeyboardBindings()
+                self.x11_keyboard = X11Keyboard
                 if not XTest.hasXTest():
                     log.error("Error: keyboard and mouse disabled without XTest support")
                 elif not X11Keyboard.hasXkb():
@@ -224,11 +228,10 @@ class X11KeyboardServer(KeyboardServer):
         except ImportError as e:
             ibuslog(f"no ibus module: {e}")
         else:
-            self.ibus_layouts = dict((k, v) for k, v in query_ibus().items() if k.startswith("engine"))
-            import threading
+            self.ibus_layouts = {k: v for k, v in query_ibus().items() if k.startswith("engine")}
+            from threading import get_ident
             from xpra.util.str_fn import Ellipsizer
-            ibuslog("loaded ibus layouts from %s: %s", threading.current_thread(),
-                    Ellipsizer(self.ibus_layouts))
+            ibuslog("loaded ibus layouts from tid=%s: %s", get_ident(), Ellipsizer(self.ibus_layouts))
 
     def cleanup(self) -> None:
         super().cleanup()
@@ -254,6 +257,10 @@ class X11KeyboardServer(KeyboardServer):
         ibuslog(f"{send_ibus_layouts=}")
         if send_ibus_layouts == noop:
             return
+        if self.ibus_layouts:
+            # ibus was ready and we already have the layouts:
+            send_ibus_layouts(self.ibus_layouts)
+            return
 
         # wait for ibus, so we will have the layouts if they exist
         def ibus_is_ready() -> None:
@@ -297,20 +304,20 @@ class X11KeyboardServer(KeyboardServer):
             # not supported by the client that owns the current keyboard config,
             # so make sure we stick to the default group:
             grp = 0
-        from xpra.x11.bindings.keyboard import X11KeyboardBindings
-        if not X11KeyboardBindings().hasXkb():
-            log(f"set_keyboard_layout_group({grp}) ignored, no Xkb support")
-            return
-        if grp < 0:
+        elif grp < 0:
             grp = 0
+        # this is the most common case, so check it before querying Xkb:
         if self.current_keyboard_group == grp:
             log(f"set_keyboard_layout_group({grp}) ignored, value unchanged")
             return
+        X11Keyboard = self.x11_keyboard
+        if not X11Keyboard or not X11Keyboard.hasXkb():
+            log(f"set_keyboard_layout_group({grp}) ignored, no Xkb support")
+            return
         log(f"set_keyboard_layout_group({grp}) config={self.keyboard_config}, {self.current_keyboard_group=}")
-        from xpra.x11.error import xsync, XError
         try:
             with xsync:
-                self.current_keyboard_group = X11KeyboardBindings().set_layout_group(grp)
+                self.current_keyboard_group = X11Keyboard.set_layout_group(grp)
         except XError as e:
             log(f"set_keyboard_layout_group({grp})", exc_info=True)
             log.error(f"Error: failed to set keyboard layout group {grp}")
@@ -331,12 +338,9 @@ class X11KeyboardServer(KeyboardServer):
         if not self.keymap_changing_timer:
             # use idle_add to give all the pending
             # events a chance to run first (and get ignored)
-            from xpra.os_util import gi_import
-            GLib = gi_import("GLib")
             self.keymap_changing_timer = GLib.timeout_add(100, reenable_keymap_changes)
         # if sharing, don't set the keymap, translate the existing one:
-        other_ui_clients = [s.uuid for s in self._server_sources.values() if s != server_source and s.ui_client]
-        translate_only = len(other_ui_clients) > 0
+        translate_only = self.has_other_ui_clients(server_source)
         log("set_keymap(%s, %s) translate_only=%s", server_source, force, translate_only)
         with xsync:
             # pylint: disable=access-member-before-definition
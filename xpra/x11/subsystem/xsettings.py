@@ -4,6 +4,7 @@
 # later version. See the file COPYING for details.
 
 import os
+import re
 from typing import Any
 
 from xpra.net.common import Packet
@@ -11,7 +12,7 @@ from xpra.util.env import envbool
 from xpra.util.str_fn import bytestostr, strtobytes
 from xpra.util.parsing import str_to_bool
 from xpra.server.subsystem.stub import StubServerMixin
-from xpra.x11.error import xsync
+from xpra.x11.error import xsync, XError
 from xpra.x11.subsystem.xsettings_prop import XSettingsType
 from xpra.server import features
 from xpra.util.objects import typedict
@@ -19,11 +20,17 @@ from xpra.log import Logger
 
 log = Logger("x11", "server", "xsettings")
 
-BLOCKLISTED_XSETTINGS: list[str] = os.environ.get(
+BLOCKLISTED_XSETTINGS: frozenset[str] = frozenset(os.environ.get(
     "XPRA_BLOCKLISTED_XSETTINGS",
     "Gdk/WindowScalingFactor,Gtk/SessionBusId,Gtk/IMModule"
-).split(",")
+).split(","))
+# xsettings names are usually bytes:
+BLOCKLISTED_XSETTINGS_BYTES: frozenset[bytes] = frozenset(x.encode("utf-8") for x in BLOCKLISTED_XSETTINGS)
 SCALED_FONT_ANTIALIAS = envbool("XPRA_SCALED_FONT_ANTIALIAS", False)
+# matches "key:\tvalue" resource lines, splitting on the first separator:
+RESOURCE_LINE_RE = re.compile(r"^(.*?):\t(.*)$", re.MULTILINE)
+# non-empty lines without a separator:
+INVALID_RESOURCE_LINE_RE = re.compile(r"^(?!.*?:\t).+$", re.MULTILINE)
 
 
 def _get_antialias_hintstyle(antialias: typedict) -> str:
@@ -50,6 +57,10 @@ class XSettingsServer(StubServerMixin):
         self._settings: dict[str, Any] = {}
         self._xsettings_enabled = False
         self._xsettings_manager = None
+        # the last "resource-manager" string we parsed, and the resulting values:
+        self._resource_manager_cache: tuple[str, dict[str, Any]] = ("", {})
+        # the inputs of the last `do_update_server_settings` call:
+        self._server_settings_state: tuple = ()
 
     def init(self, opts) -> None:
         # the server class sets the default value for 'xsettings_enabled'
@@ -77,6 +88,27 @@ class XSettingsServer(StubServerMixin):
     def init_packet_handlers(self) -> None:
         self.add_packets("server-settings", "info-request", main_thread=True)
 
+    def parse_resource_manager(self, value: str) -> dict[str, Any]:
+        """
+            Parse the resources into a dict,
+            we often get the same value again (ie: our own cooked value from `_settings`
+            when `update_all_server_settings` is called), so the result of the last call is cached
+        """
+        cached_value, cached_values = self._resource_manager_cache
+        if value == cached_value:
+            return dict(cached_values)
+        if log.is_debug_enabled():
+            for option in INVALID_RESOURCE_LINE_RE.findall(value):
+                log(f"skipped invalid option: {option!r}")
+        values = {}
+        for k, v in RESOURCE_LINE_RE.findall(value):
+            if k in BLOCKLISTED_XSETTINGS:
+                log(f"skipped blocklisted option: {k!r}")
+                continue
+            values[k] = v
+        self._resource_manager_cache = (value, dict(values))
+        return values
+
     def _process_server_settings(self, _proto, packet: Packet) -> None:
         settings = packet.get_dict(1)
         log("process_server_settings: %s", settings)
@@ -85,6 +117,7 @@ class XSettingsServer(StubServerMixin):
     def reset_settings(self) -> None:
         if not self._xsettings_enabled:
             return
+        self._server_settings_state = ()
         log("resetting xsettings to: %s", self._default_xsettings)
         self.set_xsettings(self._default_xsettings or (0, ()))
 
@@ -135,6 +168,11 @@ class XSettingsServer(StubServerMixin):
         if not self._xsettings_enabled:
             log(f"ignoring xsettings update: {settings}")
             return
+        state = self.get_server_settings_state(settings, dpi, double_click_time, double_click_distance,
+                                               antialias, cursor_size)
+        if not reset and state == self._server_settings_state:
+            log("server settings unchanged")
+            return
         if reset:
             # FIXME: preserve serial? (what happens when we change values which had the same serial?)
             self.reset_settings()
@@ -154,27 +192,24 @@ class XSettingsServer(StubServerMixin):
         log(f" {dpi=}")
         log(f" {double_click_time=}, {double_click_distance=}")
         log(f" {antialias=}")
-        # older versions may send keys as "bytes":
-        settings = {bytestostr(k): v for k, v in settings.items()}
-        self._settings.update(settings)
+        if settings is not self._settings:
+            # older versions may send keys as "bytes":
+            settings = {bytestostr(k): v for k, v in settings.items()}
+            self._settings.update(settings)
+        aa_enabled = aa_hinting = -1
+        aa_orientation = aa_hintstyle = ""
+        if antialias:
+            # used by both the "resource-manager" and "xsettings-blob" overrides:
+            ad = typedict(antialias)
+            aa_enabled = ad.intget("enabled", -1)
+            aa_hinting = ad.intget("hinting", -1)
+            aa_orientation = ad.strget("orientation", "none").lower()
+            aa_hintstyle = _get_antialias_hintstyle(ad)
+        changes: dict[str, Any] = {}
         for k, v in settings.items():
             # cook the "resource-manager" value to add the DPI and/or antialias values:
             if k == "resource-manager" and (dpi > 0 or antialias or cursor_size > 0):
-                value = bytestostr(v)
-                # parse the resources into a dict:
-                values = {}
-                options = value.split("\n")
-                for option in options:
-                    if not option:
-                        continue
-                    parts = option.split(":\t", 1)
-                    if len(parts) != 2:
-                        log(f"skipped invalid option: {option!r}")
-                        continue
-                    if parts[0] in BLOCKLISTED_XSETTINGS:
-                        log(f"skipped blocklisted option: {option!r}")
-                        continue
-                    values[parts[0]] = parts[1]
+                values = self.parse_resource_manager(bytestostr(v))
                 if cursor_size > 0:
                     values["Xcursor.size"] = cursor_size
                 if dpi > 0:
@@ -182,31 +217,27 @@ class XSettingsServer(StubServerMixin):
                     values["Xft/DPI"] = dpi * 1024
                     values["gnome.Xft/DPI"] = dpi * 1024
                 if antialias:
-                    ad = typedict(antialias)
                     subpixel_order = "none"
-                    sss = tuple(self._server_sources.values())
-                    if len(sss) == 1:
+                    if len(self._server_sources) == 1:
                         # only honour sub-pixel hinting if a single client is connected
                         # and only when it is not using any scaling (or overridden with SCALED_FONT_ANTIALIAS):
-                        ss = sss[0]
+                        ss = next(iter(self._server_sources.values()))
                         ds_unscaled = getattr(ss, "desktop_size_unscaled", None)
                         ds_scaled = getattr(ss, "desktop_size", None)
                         if SCALED_FONT_ANTIALIAS or (not ds_unscaled or ds_unscaled == ds_scaled):
-                            subpixel_order = ad.strget("orientation", "none").lower()
+                            subpixel_order = aa_orientation
                     values |= {
-                        "Xft.antialias": ad.intget("enabled", -1),
-                        "Xft.hinting": ad.intget("hinting", -1),
+                        "Xft.antialias": aa_enabled,
+                        "Xft.hinting": aa_hinting,
                         "Xft.rgba": subpixel_order,
-                        "Xft.hintstyle": _get_antialias_hintstyle(ad),
+                        "Xft.hintstyle": aa_hintstyle,
                     }
                 log(f"server_settings: resource-manager {values=}")
                 # convert the dict back into a resource string:
-                value = ''
-                for vk, vv in values.items():
-                    value += f"{vk}:\t{vv}\n"
-                # record the actual value used
-                self._settings["resource-manager"] = value
-                v = value.encode("utf-8")
+                value = "".join(f"{vk}:\t{vv}\n" for vk, vv in values.items())
+                # record the actual value used,
+                # keep it as a string so that it can be compared with the recorded value next time:
+                self._settings["resource-manager"] = v = value
 
             # cook xsettings to add various settings:
             # (as those may not be present in xsettings on some platforms… like win32 and osx)
@@ -214,43 +245,37 @@ class XSettingsServer(StubServerMixin):
             dc_distance = getattr(self, "double_click_distance", (-1, -1))
             have_override = dc_time > 0 or dc_distance != (-1, -1) or antialias or dpi > 0
             if k == "xsettings-blob" and have_override:
-                # start by removing blocklisted options:
-                def filter_blocklisted() -> tuple[int, list]:
-                    serial, values = v
-                    new_values = []
-                    for _t, _n, _v, _s in values:
-                        if bytestostr(_n) in BLOCKLISTED_XSETTINGS:
-                            log("skipped blocklisted option %s", (_t, _n, _v, _s))
-                        else:
-                            new_values.append((_t, _n, _v, _s))
-                    return serial, new_values
+                # start by removing blocklisted options,
+                # and index the remaining ones by name so overrides don't need to rescan the list:
+                serial, values = v
+                xsettings: dict[Any, tuple] = {}
+                for setting in values:
+                    name = setting[1]
+                    if name in BLOCKLISTED_XSETTINGS_BYTES or name in BLOCKLISTED_XSETTINGS:
+                        log("skipped blocklisted option %s", setting)
+                    else:
+                        xsettings[name] = setting
 
-                v = filter_blocklisted()
-
-                def set_xsettings_value(name, value_type, value):
-                    # remove existing one, if any:
-                    serial, values = v
+                def set_xsettings_value(name, value_type, value) -> None:
+                    # remove existing one, if any, so the new value is added last:
                     bn = name.encode("utf-8")
-                    new_values = [(_t, _n, _v, _s) for (_t, _n, _v, _s) in values if _n != bn]
-                    new_values.append((value_type, bn, value, 0))
-                    return serial, new_values
+                    xsettings.pop(bn, None)
+                    xsettings[bn] = (value_type, bn, value, 0)
 
-                def set_xsettings_int(name, value):
-                    if value < 0:  # not set, return v unchanged
-                        return v
-                    return set_xsettings_value(name, XSettingsType.Integer, value)
+                def set_xsettings_int(name, value) -> None:
+                    if value < 0:  # not set, leave unchanged
+                        return
+                    set_xsettings_value(name, XSettingsType.Integer, value)
 
                 if dpi > 0:
-                    v = set_xsettings_int("Xft/DPI", dpi * 1024)
+                    set_xsettings_int("Xft/DPI", dpi * 1024)
                 if double_click_time > 0:
-                    v = set_xsettings_int("Net/DoubleClickTime", double_click_time)
+                    set_xsettings_int("Net/DoubleClickTime", double_click_time)
                 if antialias:
-                    ad = typedict(antialias)
-                    v = set_xsettings_int("Xft/Antialias", ad.intget("enabled", -1))
-                    v = set_xsettings_int("Xft/Hinting", ad.intget("hinting", -1))
-                    orientation = ad.strget("orientation", "none").lower()
-                    v = set_xsettings_value("Xft/RGBA", XSettingsType.String, orientation)
-                    v = set_xsettings_value("Xft/HintStyle", XSettingsType.String, _get_antialias_hintstyle(ad))
+                    set_xsettings_int("Xft/Antialias", aa_enabled)
+                    set_xsettings_int("Xft/Hinting", aa_hinting)
+                    set_xsettings_value("Xft/RGBA", XSettingsType.String, aa_orientation)
+                    set_xsettings_value("Xft/HintStyle", XSettingsType.String, aa_hintstyle)
                 if double_click_distance != (-1, -1):
                     # some platforms give us a value for each axis,
                     # but X11 only has one, so take the average
@@ -259,17 +284,58 @@ class XSettingsServer(StubServerMixin):
                         if x > 0 and y > 0:
                             d = round((x + y) / 2)
                             d = max(1, min(128, d))  # sanitize it a bit
-                            v = set_xsettings_int("Net/DoubleClickDistance", d)
+                            set_xsettings_int("Net/DoubleClickDistance", d)
                     except Exception as e:
                         log.warn("error setting double click distance from %s: %s", double_click_distance, e)
+                v = (serial, list(xsettings.values()))
 
             if k not in old_settings or v != old_settings[k]:
-                if k == "xsettings-blob":
-                    self.set_xsettings(v)
-                elif k == "resource-manager":
-                    p = "RESOURCE_MANAGER"
-                    log(f"server_settings: setting {p} to {v}")
-                    from xpra.x11.xroot_props import root_set
-                    root_set(p, "latin1", strtobytes(v).decode("latin1"))
+                if k in ("xsettings-blob", "resource-manager"):
+                    changes[k] = v
                 else:
                     log.warn(f"Warning: unexpected setting {k}")
+        if changes:
+            # apply all the changes with a single X11 synchronization point
+            # (the nested `xsync` in `set_xsettings` will not sync on its own)
+            try:
+                with xsync:
+                    for k, v in changes.items():
+                        if k == "xsettings-blob":
+                            self.set_xsettings(v)
+                        else:
+                            p = "RESOURCE_MANAGER"
+                            log(f"server_settings: setting {p} to {v}")
+                            from xpra.x11.xroot_props import root_set
+                            # the property contains utf-8 bytes, passed through as "latin1":
+                            data = v.encode("utf-8") if isinstance(v, str) else strtobytes(v)
+                            root_set(p, "latin1", data.decode("latin1"))
+            except XError as e:
+                log("do_update_server_settings: %s", changes, exc_info=True)
+                log.warn("Warning: failed to update the server settings")
+                log.warn(" %s", e)
+                # forget the values we failed to apply, so the next update will try again:
+                self._settings = old_settings
+                return
+        self._server_settings_state = state
+
+    def get_server_settings_state(self, settings, dpi=0, double_click_time=0, double_click_distance=(-1, -1),
+                                  antialias=None, cursor_size=-1) -> tuple:
+        """
+            Everything that `do_update_server_settings` uses to generate the settings,
+            so the update can be skipped when none of it has changed
+        """
+        nsources = len(self._server_sources)
+        scaling = ()
+        if nsources == 1:
+            # the subpixel order depends on the scaling of a single client:
+            ss = next(iter(self._server_sources.values()))
+            scaling = (getattr(ss, "desktop_size_unscaled", None), getattr(ss, "desktop_size", None))
+        return (
+            tuple(settings.items()),
+            dpi, double_click_time, double_click_distance,
+            dict(antialias) if antialias else None,
+            cursor_size,
+            getattr(self, "double_click_time", 0),
+            getattr(self, "double_click_distance", (-1, -1)),
+            nsources, scaling,
+        )
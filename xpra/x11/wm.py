@@ -77,6 +77,8 @@ class Wm(GObject.GObject):
         # A new window has shown up:
         "new-window": one_arg_signal,
         "show-desktop": one_arg_signal,
+        # we have reset `_NET_WORKAREA` to the full display:
+        "workarea-reset": no_arg_signal,
         # You can emit this to cause the WM to quit, or the WM may
         # spontaneously raise it if another WM takes over the display.  By
         # default, unmanages all windows:
@@ -134,6 +136,7 @@ class Wm(GObject.GObject):
         set_supported()
         # Start with the full display as workarea:
         set_workarea(0, 0, root_w, root_h)
+        self.emit("workarea-reset")
         set_desktop_geometry(root_w, root_h)
         set_desktop_viewport(0, 0)
 